@@ -81,10 +81,11 @@ def scan_from_db(limit: int = 1) -> None:
 def extract_from_db(limit: int = 1) -> None:
     """
     Extracts from DB texts.
+    Documents are scheduled largest first across WORKER_CONCURRENCY processes.
     """
     from question_extractor.infra.files import file_manager
-    from question_extractor.domain.extraction import ExtractionService
     from question_extractor.domain.reporting import ReportGenerator
+    from question_extractor.domain.scheduler import BatchScheduler, MB, estimate_task
     
     if settings.SAFE_MODE:
         if limit > 1:
@@ -94,6 +95,7 @@ def extract_from_db(limit: int = 1) -> None:
     query = "SELECT texto_id, texto_titulo FROM texto ORDER BY texto_id ASC LIMIT %s"
     textos = db.fetch_all(query, (limit,))
     
+    tasks = []
     for t in textos:
         titulo = t['texto_titulo']
         filename = f"{titulo}.docx"
@@ -103,21 +105,30 @@ def extract_from_db(limit: int = 1) -> None:
             logger.error(f"File missing: {file_path}")
             # In production, we might want to continue or log
             continue
-            
-        logger.info(f"Extracting {filename}...")
-        service = ExtractionService(file_path)
+        
         # We use a sanitized name or ID for the output folder
         safe_name = "".join(c for c in titulo if c.isalnum() or c in ('-', '_'))
-        
         try:
-            report_data = service.extract_all(safe_name)
-            
+            tasks.append(estimate_task(safe_name, file_path))
+        except Exception as e:
+            logger.error(f"Cannot read {filename}", error=str(e))
+    
+    scheduler = BatchScheduler(
+        workers=settings.WORKER_CONCURRENCY,
+        memory_budget=settings.SCHEDULER_MEMORY_BUDGET_MB * MB,
+        memory_factor=settings.SCHEDULER_XML_MEMORY_FACTOR,
+        shard_min_xml=settings.SCHEDULER_SHARD_MIN_XML_MB * MB,
+        checkpoints=settings.WRITE_DB_RESULTS,
+    )
+    generator = ReportGenerator()
+    
+    for report_data in scheduler.run(tasks):
+        try:
             # Generate HTML Report
-            generator = ReportGenerator()
             generator.generate_html(report_data)
             
         except Exception as e:
-            logger.error(f"Failed extraction/reporting for {filename}", error=str(e))
+            logger.error(f"Failed reporting for {report_data['doc_source_id']}", error=str(e))
 
 
 @app.command()
@@ -127,6 +138,7 @@ def extract_single(doc_source_id: str) -> None:
     """
     from question_extractor.infra.files import file_manager
     from question_extractor.domain.extraction import ExtractionService
+    from question_extractor.domain.persistence import repository
     
     filename = f"{doc_source_id}.docx"
     file_path = file_manager.resolve_path(filename)
@@ -136,7 +148,104 @@ def extract_single(doc_source_id: str) -> None:
         return
 
     service = ExtractionService(file_path)
-    service.extract_all(doc_source_id)
+    checkpoint = repository.start_job(doc_source_id, file_path) if settings.WRITE_DB_RESULTS else None
+    service.extract_all(doc_source_id, checkpoint)
+
+
+@app.command()
+def reextract_question(doc_source_id: str, question_id: str) -> None:
+    """
+    Re-extracts a single question (e.g. q_0005) using its persisted block range.
+    """
+    from pathlib import Path
+    from question_extractor.infra.files import file_manager
+    from question_extractor.domain.extraction import ExtractionService
+    from question_extractor.domain.persistence import repository
+    
+    row = repository.get_latest_question(doc_source_id, question_id)
+    if row is None:
+        logger.error(f"No extracted question {question_id} for {doc_source_id}")
+        raise typer.Exit(code=1)
+    
+    if row['block_start'] is None or not row['source_path']:
+        logger.error(f"{question_id} has no block range recorded. Rerun the full extraction.")
+        raise typer.Exit(code=1)
+    
+    file_path = Path(row['source_path'])
+    if not file_path.exists():
+        logger.error(f"File missing: {file_path}")
+        raise typer.Exit(code=1)
+    
+    # Unchanged source: reuse the exact range.
+    # Edited source: the question end is rescanned, assuming earlier questions were not touched.
+    # The fingerprint (question position and numbering) catches a range that now points at another question.
+    document_hash = file_manager.hash_file(file_path)
+    block_end = row['block_end'] if document_hash == row['document_hash'] else None
+    
+    service = ExtractionService(file_path)
+    try:
+        result = service.extract_question(
+            doc_source_id, question_id, row['block_start'], block_end, row['block_fingerprint']
+        )
+    except ValueError as e:
+        logger.error(f"Cannot re-extract {question_id}: {e}. Rerun the full extraction.")
+        raise typer.Exit(code=1)
+    
+    repository.update_question(row, result, document_hash)
+    print(f"{question_id}: {result['status']} ({len(result['files'])} files)")
+
+
+@app.command()
+def search(text: str, limit: int = 20) -> None:
+    """
+    Searches extracted questions and alternatives by wording (Portuguese full-text search).
+    """
+    from question_extractor.domain.persistence import repository
+
+    try:
+        rows = repository.search_questions(text, limit)
+    except Exception as e:
+        logger.error("Search failed", error=str(e))
+        raise typer.Exit(code=1)
+
+    print(f"--- {len(rows)} results for '{text}' ---")
+    for row in rows:
+        print(f"\n[{row['rank']:.3f}] {row['doc_source_id']} / {row['question_identifier']} ({row['status']})")
+        print(f"  question: {row['question_path']}")
+        for key, path in sorted((row['alternatives_json'] or {}).items()):
+            print(f"  {key}: {path}")
+
+
+@app.command()
+def dedup(batch_size: int = settings.DEDUP_BATCH_SIZE) -> None:
+    """
+    Hashes newly extracted questions and links near-duplicates to a canonical question.
+    """
+    from question_extractor.domain.dedup import DedupService
+
+    service = DedupService(
+        num_perm=settings.DEDUP_NUM_PERM,
+        bands=settings.DEDUP_BANDS,
+        shingle_size=settings.DEDUP_SHINGLE_SIZE,
+        threshold=settings.DEDUP_THRESHOLD,
+    )
+    try:
+        stats = service.run(batch_size)
+    except Exception as e:
+        logger.error("Dedup failed", error=str(e))
+        raise typer.Exit(code=1)
+
+    print(f"Hashed: {stats['hashed']}, Duplicates: {stats['duplicates']}, Without text: {stats['empty']}")
+
+
+@app.command()
+def serve(host: str = settings.DAEMON_HOST, port: int = settings.DAEMON_PORT) -> None:
+    """
+    Runs a local extraction daemon that keeps parsers, templates and recent documents warm.
+    """
+    from question_extractor.server.daemon import serve as run_daemon
+
+    run_daemon(host, port)
 
 
 @app.command()
@@ -154,25 +263,25 @@ def inspect_table(table_name: str, limit: int = 5) -> None:
 
 
 @app.command()
-def migrate() -> None:
+def migrate(partition_questions: bool = False) -> None:
     """
-    Runs the database migrations.
+    Runs the pending database migrations.
+    With --partition-questions, also converts extracted_questions to range partitions by job.
     """
-    from pathlib import Path
+    from question_extractor.infra.migrator import migration_runner
     logger.info("Running migrations...")
     try:
-        # Resolve path relative to this file or package structure
-        # We know it is in ../infra/migrations/001_init.sql relative to cli/main.py
-        # Or easier: assume we are at package root.
-        # Better: use __file__
-        base_dir = Path(__file__).resolve().parent.parent 
-        migration_file = base_dir / "infra" / "migrations" / "001_init.sql"
+        applied = migration_runner.run()
+        for migration in applied:
+            logger.info(f"Migration {migration.path.name} executed successfully.")
+        if not applied:
+            logger.info("Schema is up to date.")
         
-        if not migration_file.exists():
-             raise FileNotFoundError(f"Migration file not found at {migration_file}")
-
-        db.execute_script(str(migration_file))
-        logger.info("Migration 001_init.sql executed successfully.")
+        if partition_questions:
+            if migration_runner.partition_questions():
+                logger.info("extracted_questions partitioned by job_id.")
+            else:
+                logger.info("extracted_questions is already partitioned.")
     except Exception as e:
         logger.error("Migration failed", error=str(e))
         raise typer.Exit(code=1)
@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from question_extractor.ooxml.scanner import REGEX_QUESTION_START, REGEX_ALTERNATIVE_START
+from question_extractor.domain.persistence import repository
+
+logger = logging.getLogger(__name__)
+
+# Hash permutations are (a * x + b) mod p with p < 2**31, so products fit in uint64
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+# Fixed seed: signatures are persisted and must stay comparable across runs
+MINHASH_SEED = 20240501
+
+REGEX_WORD = re.compile(r'\w+')
+REGEX_LEADING_NUMBER = re.compile(r'^\s*\d{1,3}\s*[\)\.\-:]?\s*')
+
+
+def question_parts(question_text: Optional[str], alternatives_text: Optional[Dict[str, str]]) -> List[str]:
+    """
+    Returns the text parts used for shingling, without question/alternative markers.
+    Numbering changes between exams, so "QUESTÃO 12" and "B)" must not count as content.
+    """
+    parts = []
+    if question_text:
+        text = question_text
+        match = REGEX_QUESTION_START.match(text)
+        if match:
+            text = text[match.end():]
+            if not match.group(1)[0].isdigit():
+                # Word form ("QUESTÃO 12"): the number follows the marker
+                text = REGEX_LEADING_NUMBER.sub('', text, count=1)
+        parts.append(text)
+    for alt_text in (alternatives_text or {}).values():
+        parts.append(REGEX_ALTERNATIVE_START.sub('', alt_text, count=1))
+    return parts
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, shingle_size: int, seed: int = MINHASH_SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, parts: List[str]) -> np.ndarray:
+        """
+        Hashes of the word k-shingles of each part. Shingles never cross part boundaries,
+        so reordered alternatives produce the same set.
+        """
+        hashes = set()
+        k = self.shingle_size
+        for part in parts:
+            tokens = REGEX_WORD.findall(part.lower())
+            if 0 < len(tokens) < k:
+                hashes.add(zlib.crc32(" ".join(tokens).encode("utf-8")))
+            for i in range(len(tokens) - k + 1):
+                hashes.add(zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")))
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, parts: List[str]) -> Optional[np.ndarray]:
+        shingles = self.shingles(parts)
+        if shingles.size == 0:
+            return None
+        # (shingles x permutations) matrix, minimum per permutation
+        hashed = (np.outer(shingles % MERSENNE_PRIME, self.a) + self.b) % MERSENNE_PRIME
+        return hashed.min(axis=0).astype('<u4')
+
+
+class DedupService:
+    """
+    Incremental near-duplicate detection with MinHash + LSH.
+    Only questions without a stored signature are hashed; each one is linked to the
+    cluster of its closest earlier match, or starts its own cluster.
+    """
+    def __init__(self, num_perm: int, bands: int, shingle_size: int, threshold: float):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+    def band_keys(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8).digest()
+            keys.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return keys
+
+    def run(self, batch_size: int) -> Dict[str, int]:
+        stats = {"hashed": 0, "duplicates": 0, "empty": 0}
+        while True:
+            rows = repository.fetch_unsigned_questions(batch_size)
+            if not rows:
+                break
+            batch_stats = self.process_batch(rows)
+            for key, value in batch_stats.items():
+                stats[key] += value
+            logger.info(f"Dedup progress: {stats}")
+        return stats
+
+    def process_batch(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        stats = {"hashed": 0, "duplicates": 0, "empty": 0}
+        signed = []
+        for row in rows:
+            signature = self.hasher.signature(question_parts(row['question_text'], row['alternatives_text']))
+            signed.append((row['id'], signature, self.band_keys(signature) if signature is not None else []))
+
+        # One lookup for every bucket touched by this batch
+        all_keys = {key for _, _, keys in signed for key in keys}
+        candidates = repository.fetch_bucket_candidates(list(all_keys))
+
+        # question_id -> (signature, cluster_id), for stored and in-batch questions
+        known: Dict[int, Tuple[np.ndarray, int]] = {
+            qid: (np.frombuffer(sig, dtype='<u4'), cluster_id)
+            for qid, (sig, cluster_id) in candidates["signatures"].items()
+        }
+        buckets: Dict[Tuple[int, int], List[int]] = candidates["buckets"]
+
+        results = []
+        for question_id, signature, keys in signed:
+            if signature is None:
+                stats["empty"] += 1
+                results.append((question_id, b'', question_id, []))
+                continue
+
+            candidate_ids = sorted({cid for key in keys for cid in buckets.get(key, []) if cid != question_id})
+            cluster_id = question_id
+            if candidate_ids:
+                matrix = np.stack([known[cid][0] for cid in candidate_ids])
+                similarity = (matrix == signature).mean(axis=1)
+                matches = [cid for cid, sim in zip(candidate_ids, similarity) if sim >= self.threshold]
+                if matches:
+                    # The canonical question is the oldest one in the cluster
+                    cluster_id = min(known[cid][1] for cid in matches)
+                    stats["duplicates"] += 1
+
+            known[question_id] = (signature, cluster_id)
+            for key in keys:
+                buckets.setdefault(key, []).append(question_id)
+            results.append((question_id, signature.tobytes(), cluster_id, keys))
+            stats["hashed"] += 1
+
+        repository.save_signatures(results)
+        return stats
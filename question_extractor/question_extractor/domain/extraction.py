@@ -1,92 +1,217 @@
+import hashlib
 import logging
 import re
+import unicodedata
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from question_extractor.ooxml.reader import DocxReader, NAMESPACES
 from question_extractor.ooxml.scanner import REGEX_QUESTION_START, REGEX_ALTERNATIVE_START
 from question_extractor.ooxml.segmenter import DocxSegmenter
+from question_extractor.ooxml.archive import DocxArchive
+from question_extractor.domain.persistence import JobCheckpoint
 from question_extractor.infra.files import file_manager
 from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+REGEX_WHITESPACE = re.compile(r'\s+')
+REGEX_MARKER_NUMBER = re.compile(r'\s*(\d{1,3})') # matched right after the marker
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes extracted text for storage and search (NFC, collapsed whitespace).
+    """
+    return REGEX_WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+def block_text(elem: etree._Element) -> str:
+    """
+    Plain text of a body block. Table paragraphs are joined with spaces so cells do not run together.
+    """
+    if elem.tag.endswith('p'):
+        return "".join(elem.itertext())
+    return " ".join("".join(p.itertext()) for p in elem.iterfind(".//w:p", NAMESPACES))
+
+def question_id(index: int) -> str:
+    return f"q_{index + 1:04d}"
+
+def question_marker(text: str) -> str:
+    """
+    Numbering of a question start ("12)", "QUESTÃO 12"), without its wording.
+    """
+    match = REGEX_QUESTION_START.match(text)
+    if not match:
+        return ""
+    marker = match.group(1).strip().upper()
+    if not marker[0].isdigit():
+        # Word form: the number follows the marker
+        number = REGEX_MARKER_NUMBER.match(text, match.end())
+        if number:
+            marker = f"{marker} {number.group(1)}"
+    return marker
+
+def question_fingerprint(q_id: str, elem: etree._Element) -> str:
+    """
+    Identifies a question start by its position and numbering, so a persisted range can be
+    checked against an edited document. The wording is left out: fixing the stem keeps it.
+    """
+    marker = question_marker(normalize_text(block_text(elem)))
+    return hashlib.sha256(f"{q_id}:{marker}".encode("utf-8")).hexdigest()
+
 class ExtractionService:
-    def __init__(self, doc_path: Path):
+    def __init__(self, doc_path: Path, archive: Optional[DocxArchive] = None):
         self.doc_path = doc_path
-        self.segmenter = DocxSegmenter(doc_path)
+        self.archive = archive
+        self.segmenter = DocxSegmenter(doc_path, archive)
 
-    def extract_all(self, doc_source_id: str) -> Dict[str, Any]:
-        """
-        Parses the document, segments questions, and writes outputs.
-        Returns a report dict.
-        """
-        report = {
+    def new_report(self, doc_source_id: str, document_hash: Optional[str] = None) -> Dict[str, Any]:
+        return {
             "doc_source_id": doc_source_id,
+            "source_path": str(self.doc_path),
+            "document_hash": document_hash or file_manager.hash_file(self.doc_path),
             "questions": [],
             "stats": {"total": 0, "extracted": 0, "error": 0}
         }
+
+    @staticmethod
+    def add_result(report: Dict[str, Any], result: Dict[str, Any]) -> None:
+        report["questions"].append(result)
+        
+        if result["status"] == "extracted":
+            report["stats"]["extracted"] += 1
+        else:
+            report["stats"]["error"] += 1
+        report["stats"]["total"] += 1
+
+    def extract_all(self, doc_source_id: str, checkpoint: Optional[JobCheckpoint] = None) -> Dict[str, Any]:
+        """
+        Parses the document, segments questions, and writes outputs.
+        Returns a report dict.
+        With a JobCheckpoint, progress is committed as questions are written and
+        questions already completed by a previous run are skipped.
+        """
+        report = self.new_report(doc_source_id, checkpoint.document_hash if checkpoint else None)
         
         try:
-            with DocxReader(self.doc_path) as reader:
+            with DocxReader(self.doc_path, self.archive) as reader:
+                # Outputs are built from the tree parsed here, not from a second parse
+                self.segmenter.use_document(reader.document_xml)
 
                 # Use body blocks (paragraphs AND tables) to preserve order
                 blocks = reader.get_body_blocks()
+                question_ranges = self.find_question_ranges(reader, blocks)
                 
-                # Naive grouping:
-                # - Find start of Q1 (must be a paragraph with text matching regex)
-                # - Find start of Q2
-                # - elements between Q1 and Q2 -> Q1 Block
-                
-                q_indices = []
-                for i, elem in enumerate(blocks):
-                    # Only check text if it is a paragraph
-                    if elem.tag.endswith('p'):
-                         text = reader.extract_text(elem).strip()
-                         if REGEX_QUESTION_START.match(text):
-                             q_indices.append(i)
+                logger.info(f"Found {len(question_ranges)} potential questions.")
                 
-                # Add end sentinel
-                q_indices.append(len(blocks))
-                
-                logger.info(f"Found {len(q_indices)-1} potential questions.")
-                
-                for k in range(len(q_indices) - 1):
-                    start_idx = q_indices[k]
-                    end_idx = q_indices[k+1]
-                    
-                    # Create a Question ID
-                    # Try to extract number from text
-                    start_elem = blocks[start_idx]
-                    if start_elem.tag.endswith('p'):
-                         text_start = reader.extract_text(start_elem).strip()
-                         # e.g. "QUESTÃO 01" -> "q_01" (logic can be added here)
-                    
-                    # Just use index for safety if regex fails or logic is complex
-                    q_id = f"q_{k+1:04d}"
-                    
-                    # Block elements
-                    block_elements = blocks[start_idx:end_idx]
-                    
-                    # Process this block for alternatives
-                    result = self.process_question_block(doc_source_id, q_id, block_elements)
-                    report["questions"].append(result)
-                    
-                    if result["status"] == "extracted":
-                        report["stats"]["extracted"] += 1
-                    else:
-                        report["stats"]["error"] += 1
-                    report["stats"]["total"] += 1
+                for result in self._extract_blocks(doc_source_id, blocks, question_ranges, checkpoint):
+                    self.add_result(report, result)
                     
         except Exception as e:
-            logger.error("Extraction failed at document level", error=str(e))
+            logger.error(f"Extraction failed at document level: {e}")
+            if checkpoint:
+                checkpoint.fail(str(e))
             raise
+        
+        if checkpoint:
+            checkpoint.finish()
             
         return report
 
-    def process_question_block(self, doc_source_id: str, q_id: str, elements: List[etree._Element]) -> Dict[str, Any]:
+    def extract_ranges(self, doc_source_id: str, question_ranges: List[Tuple[str, int, int]],
+                       checkpoint: Optional[JobCheckpoint] = None, first_block: int = 0) -> List[Dict[str, Any]]:
+        """
+        Extracts a subset of questions (a shard of find_question_ranges) with a single parse.
+        The archive may hold a shard document whose body is a slice of the original one;
+        first_block is the original index of its first block, so ranges stay absolute.
+        The checkpoint is flushed but not finished: other shards may still be running.
+        """
+        with DocxReader(self.doc_path, self.archive) as reader:
+            self.segmenter.use_document(reader.document_xml)
+            blocks = reader.get_body_blocks()
+            try:
+                return list(self._extract_blocks(doc_source_id, blocks, question_ranges, checkpoint, first_block))
+            finally:
+                if checkpoint:
+                    checkpoint.flush()
+
+    def _extract_blocks(self, doc_source_id: str, blocks: List[etree._Element],
+                        question_ranges: List[Tuple[str, int, int]], checkpoint: Optional[JobCheckpoint],
+                        first_block: int = 0) -> Iterator[Dict[str, Any]]:
+        for q_id, start_idx, end_idx in question_ranges:
+            # Outputs of a previous run that were verified on disk
+            result = checkpoint.completed.get(q_id) if checkpoint else None
+            if result is None:
+                # Process this block for alternatives
+                elements = blocks[start_idx - first_block:end_idx - first_block]
+                result = self.process_question_block(doc_source_id, q_id, elements, start_idx)
+                if checkpoint:
+                    checkpoint.add(result)
+            yield result
+
+    def find_question_ranges(self, reader: DocxReader, blocks: List[etree._Element]) -> List[Tuple[str, int, int]]:
+        # Naive grouping:
+        # - Find start of Q1 (must be a paragraph with text matching regex)
+        # - Find start of Q2
+        # - elements between Q1 and Q2 -> Q1 Block
+        
+        q_indices = []
+        for i, elem in enumerate(blocks):
+            if self.is_question_start(reader, elem):
+                q_indices.append(i)
+        
+        # Add end sentinel
+        q_indices.append(len(blocks))
+        
+        # Just use index for safety if regex fails or logic is complex
+        return [(question_id(k), q_indices[k], q_indices[k+1]) for k in range(len(q_indices) - 1)]
+
+    def extract_question(self, doc_source_id: str, q_id: str, block_start: int, block_end: Optional[int] = None,
+                         fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Re-extracts a single question from its persisted block range.
+        When block_end is None the range is recomputed by scanning forward to the next question start.
+        When a fingerprint is given, the block at block_start must still start the same question:
+        same numbering and same position among the question starts of the document.
+        """
+        with DocxReader(self.doc_path, self.archive) as reader:
+            self.segmenter.use_document(reader.document_xml)
+            blocks = reader.get_body_blocks()
+            
+            if block_start >= len(blocks) or not self.is_question_start(reader, blocks[block_start]):
+                raise ValueError(f"Block {block_start} no longer starts question {q_id}")
+            
+            if fingerprint:
+                index = sum(1 for block in blocks[:block_start] if self.is_question_start(reader, block))
+                if question_fingerprint(question_id(index), blocks[block_start]) != fingerprint:
+                    raise ValueError(f"Block {block_start} no longer holds the start of question {q_id}")
+            
+            if block_end is None:
+                block_end = block_start + 1
+                while block_end < len(blocks) and not self.is_question_start(reader, blocks[block_end]):
+                    block_end += 1
+            
+            result = self.process_question_block(doc_source_id, q_id, blocks[block_start:block_end], block_start)
+        
+        # Drop outputs of alternatives that no longer exist
+        output_dir = file_manager.get_output_dir(doc_source_id, q_id)
+        current_files = set(result["files"].values())
+        for stale in output_dir.glob("*.docx"):
+            if str(stale) not in current_files:
+                stale.unlink()
+                
+        return result
+
+    def is_question_start(self, reader: DocxReader, elem: etree._Element) -> bool:
+        # Only paragraphs can start a question
+        if not elem.tag.endswith('p'):
+            return False
+        text = reader.extract_text(elem).strip()
+        return bool(REGEX_QUESTION_START.match(text))
+
+    def process_question_block(self, doc_source_id: str, q_id: str, elements: List[etree._Element], start_idx: int = 0) -> Dict[str, Any]:
         """
         Splits a question block into Question vs Alternatives.
         Writes respective files.
+        start_idx is the body block index of the first element, used to record block ranges.
         """
         output_dir = file_manager.get_output_dir(doc_source_id, q_id)
         
@@ -95,12 +220,14 @@ class ExtractionService:
         
         question_elems = []
         options = {} # "A": [elems], "B": [elems]
+        option_ranges = {} # "A": [start, end] relative to the question start
+        texts = {"question": []} # plain text per part, persisted for search
         current_option = None
         
         # We need a text extractor helper or just use simplistic check
         # Reuse regex
         
-        for elem in elements:
+        for offset, elem in enumerate(elements):
             # Check if this element starts a new alternative
             # Only paragraphs can start an alternative (tables probably belong to previous content)
             
@@ -117,18 +244,27 @@ class ExtractionService:
                 current_option = marker
                 options[current_option] = []
                 options[current_option].append(elem)
+                option_ranges[current_option] = [offset, offset + 1]
+                texts[current_option] = [text]
             else:
                 # Continue previous option or add to question
                 if current_option:
                     options[current_option].append(elem)
+                    option_ranges[current_option][1] = offset + 1
+                    texts[current_option].append(block_text(elem))
                 else:
                     question_elems.append(elem)
+                    texts["question"].append(block_text(elem))
         
         # 2. Write Files
         res = {
             "question_id": q_id,
             "status": "extracted",
             "confidence": 100,
+            "block_range": [start_idx, start_idx + len(elements)],
+            "alternative_ranges": option_ranges,
+            "fingerprint": question_fingerprint(q_id, elements[0]) if elements else None,
+            "text": {k: normalize_text(" ".join(v)) for k, v in texts.items()},
             "files": {}
         }
         
@@ -145,7 +281,7 @@ class ExtractionService:
                 res["files"][opt_key] = str(opt_path)
                 
         except Exception as e:
-            logger.error(f"Failed to write segment for {q_id}", error=str(e))
+            logger.error(f"Failed to write segment for {q_id}: {e}")
             res["status"] = "error"
             res["confidence"] = 0
             res["error"] = str(e)
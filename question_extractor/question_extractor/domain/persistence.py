@@ -1,20 +1,88 @@
 import logging
 import json
-from typing import Dict, Any
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
 from question_extractor.infra.db import db
+from question_extractor.infra.files import file_manager
+from question_extractor.infra.settings import settings
 
 logger = logging.getLogger(__name__)
 
+INSERT_QUESTION_QUERY = """
+    INSERT INTO extracted_questions
+    (job_id, question_identifier, status, confidence_score, question_path, alternatives_json, error_note,
+     document_hash, block_start, block_end, alternative_ranges, block_fingerprint, question_text, alternatives_text)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+"""
+
+class JobCheckpoint:
+    """
+    Progress of one extraction job.
+    Question rows are buffered and committed in batches together with the last completed block index.
+    `completed` holds results of a previous run whose outputs were verified on disk.
+    Every commit renews the job lease; a batch is committed early once half the lease has passed.
+    """
+    def __init__(self, repository: "ExtractionRepository", job_id: int, document_hash: str,
+                 completed: Dict[str, Dict[str, Any]], batch_size: int, lease_seconds: int):
+        self.repository = repository
+        self.job_id = job_id
+        self.document_hash = document_hash
+        self.completed = completed
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.pending: list[Dict[str, Any]] = []
+        # Monotonic clock is system-wide, the value stays meaningful in the scheduler process
+        self.renewed_at = time.monotonic()
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size or self.lease_due():
+            self.flush()
+
+    def lease_due(self) -> bool:
+        return time.monotonic() - self.renewed_at >= self.lease_seconds / 2
+
+    def renew(self) -> None:
+        """
+        Keeps the job claimed while nothing is committed, e.g. while its shards wait in the queue.
+        """
+        if self.lease_due():
+            self.repository.renew_job(self.job_id)
+            self.renewed_at = time.monotonic()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        self.repository.save_checkpoint(self.job_id, self.pending, self.document_hash)
+        self.pending = []
+        self.renewed_at = time.monotonic()
+
+    def finish(self) -> None:
+        self.flush()
+        self.repository.update_job_status(self.job_id, "completed")
+
+    def fail(self, error_message: str) -> None:
+        # Keep what was already materialized so a rerun can resume from it
+        self.flush()
+        self.repository.update_job_status(self.job_id, "failed", error_message)
+
+
 class ExtractionRepository:
-    def create_job(self, doc_source_id: str, status: str = "processing") -> int:
+    def create_job(self, doc_source_id: str, status: str = "processing", source_path: Optional[str] = None,
+                   document_hash: Optional[str] = None) -> int:
         query = """
-            INSERT INTO extraction_jobs (doc_source_id, status)
-            VALUES (%s, %s)
+            INSERT INTO extraction_jobs (doc_source_id, status, source_path, document_hash)
+            VALUES (%s, %s, %s, %s)
             RETURNING job_id;
         """
-        rows = db.fetch_all(query, (doc_source_id, status))
-        if rows:
-            return rows[0]['job_id']
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (doc_source_id, status, source_path, document_hash))
+                row = cur.fetchone()
+                conn.commit()
+        if row:
+            return row['job_id']
         raise RuntimeError("Failed to create job")
 
     def update_job_status(self, job_id: int, status: str, error_message: str = None) -> None:
@@ -28,30 +96,312 @@ class ExtractionRepository:
                 cur.execute(query, (status, error_message, job_id))
                 conn.commit()
 
-    def save_questions(self, job_id: int, questions: list[Dict[str, Any]]) -> None:
+    def renew_job(self, job_id: int) -> None:
+        query = """
+            UPDATE extraction_jobs
+            SET updated_at = NOW()
+            WHERE job_id = %s AND status = 'processing';
+        """
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (job_id,))
+                conn.commit()
+
+    def start_job(self, doc_source_id: str, file_path: Path, batch_size: Optional[int] = None) -> JobCheckpoint:
+        """
+        Claims the latest interrupted job for this exact document (same hash), or creates a new one.
+        A job is only taken over if it failed, or if it is still 'processing' but made no progress
+        for JOB_LEASE_SECONDS (its worker died). The JobCheckpoint renews the lease while it runs.
+        """
+        document_hash = file_manager.hash_file(file_path)
+        # Serializes concurrent starts of the same document, released on commit
+        lock_query = "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0));"
+        claim_query = """
+            SELECT job_id
+            FROM extraction_jobs
+            WHERE doc_source_id = %s AND document_hash = %s
+              AND (status = 'failed'
+                   OR (status = 'processing' AND updated_at < NOW() - %s * INTERVAL '1 second'))
+            ORDER BY job_id DESC
+            LIMIT 1
+            FOR UPDATE;
+        """
+        resume_query = """
+            UPDATE extraction_jobs
+            SET status = 'processing', error_message = NULL, updated_at = NOW()
+            WHERE job_id = %s;
+        """
+        create_query = """
+            INSERT INTO extraction_jobs (doc_source_id, status, source_path, document_hash)
+            VALUES (%s, 'processing', %s, %s)
+            RETURNING job_id;
+        """
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(lock_query, (f"{doc_source_id}:{document_hash}",))
+                cur.execute(claim_query, (doc_source_id, document_hash, settings.JOB_LEASE_SECONDS))
+                row = cur.fetchone()
+                if row:
+                    job_id = row['job_id']
+                    cur.execute(resume_query, (job_id,))
+                else:
+                    cur.execute(create_query, (doc_source_id, str(file_path), document_hash))
+                    job_id = cur.fetchone()['job_id']
+                conn.commit()
+        
+        if row:
+            completed = self.get_verified_questions(job_id)
+            logger.info(f"Resuming job {job_id} for {doc_source_id}: {len(completed)} questions already done")
+        else:
+            completed = {}
+        
+        return JobCheckpoint(self, job_id, document_hash, completed, batch_size or settings.CHECKPOINT_BATCH_SIZE,
+                             settings.JOB_LEASE_SECONDS)
+
+    def get_verified_questions(self, job_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Results of a job's successful questions whose output files are all present and valid.
+        """
+        query = """
+            SELECT *
+            FROM extracted_questions
+            WHERE job_id = %s AND status <> 'error';
+        """
+        completed = {}
+        for row in db.fetch_all(query, (job_id,)):
+            files = {"question": row['question_path'], **(row['alternatives_json'] or {})}
+            if not all(file_manager.is_valid_output(Path(path)) for path in files.values()):
+                continue
+            
+            texts = dict(row['alternatives_text'] or {})
+            if row['question_text'] is not None:
+                texts["question"] = row['question_text']
+            
+            completed[row['question_identifier']] = {
+                "question_id": row['question_identifier'],
+                "status": row['status'],
+                "confidence": row['confidence_score'],
+                "block_range": [row['block_start'], row['block_end']],
+                "alternative_ranges": row['alternative_ranges'] or {},
+                "fingerprint": row['block_fingerprint'],
+                "text": texts,
+                "files": files,
+            }
+        return completed
+
+    def save_checkpoint(self, job_id: int, questions: list[Dict[str, Any]], document_hash: str) -> None:
+        """
+        Writes a batch of question rows and advances the job progress in one transaction.
+        Rows left by an earlier attempt of the same questions are replaced.
+        """
+        delete_query = """
+            DELETE FROM extracted_questions
+            WHERE job_id = %s AND question_identifier = ANY(%s)
+            RETURNING id;
+        """
+        progress_query = """
+            UPDATE extraction_jobs
+            SET last_block_index = GREATEST(COALESCE(last_block_index, -1), %s),
+                questions_completed = (SELECT COUNT(*) FROM extracted_questions WHERE job_id = %s),
+                updated_at = NOW()
+            WHERE job_id = %s;
+        """
+        last_block_index = max(q['block_range'][1] for q in questions) - 1
+        
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(delete_query, (job_id, [q['question_id'] for q in questions]))
+                replaced = [row['id'] for row in cur.fetchall()]
+                if replaced:
+                    self._delete_signatures(cur, replaced)
+                
+                cur.executemany(INSERT_QUESTION_QUERY, [
+                    (job_id, q.get('question_id')) + self._question_values(q, document_hash) for q in questions
+                ])
+                cur.execute(progress_query, (last_block_index, job_id, job_id))
+                conn.commit()
+
+    def get_latest_question(self, doc_source_id: str, question_identifier: str) -> Optional[Dict[str, Any]]:
+        query = """
+            SELECT q.*, j.source_path
+            FROM extracted_questions q
+            JOIN extraction_jobs j ON j.job_id = q.job_id
+            WHERE j.doc_source_id = %s AND q.question_identifier = %s
+            ORDER BY q.id DESC
+            LIMIT 1;
+        """
+        rows = db.fetch_all(query, (doc_source_id, question_identifier))
+        return rows[0] if rows else None
+
+    def search_questions(self, text: str, limit: int = 20) -> list[Dict[str, Any]]:
+        """
+        Full-text search over question and alternative text, best matches first.
+        Only the latest completed job of each document is searched, so a running or failed
+        re-extraction does not hide the previous results.
+        """
+        query = """
+            SELECT j.doc_source_id, q.question_identifier, q.status, q.question_path, q.alternatives_json,
+                   ts_rank_cd(q.search_vector, query) AS rank
+            FROM extracted_questions q
+            JOIN extraction_jobs j ON j.job_id = q.job_id,
+                 websearch_to_tsquery('portuguese', %s) query
+            WHERE q.search_vector @@ query
+              AND q.job_id = (
+                  SELECT MAX(latest.job_id) FROM extraction_jobs latest
+                  WHERE latest.doc_source_id = j.doc_source_id AND latest.status = 'completed'
+              )
+            ORDER BY rank DESC
+            LIMIT %s;
+        """
+        return db.fetch_all(query, (text, limit))
+
+    def fetch_unsigned_questions(self, limit: int) -> list[Dict[str, Any]]:
+        """
+        Questions with extracted text but no MinHash signature yet, oldest first.
+        Questions of jobs superseded by a newer completed job of the same document are skipped.
+        """
         query = """
-            INSERT INTO extracted_questions 
-            (job_id, question_identifier, status, confidence_score, question_path, alternatives_json, error_note)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
+            SELECT q.id, q.question_text, q.alternatives_text
+            FROM extracted_questions q
+            JOIN extraction_jobs j ON j.job_id = q.job_id
+            WHERE q.question_text IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM question_signatures s WHERE s.question_id = q.id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM extraction_jobs newer
+                  WHERE newer.doc_source_id = j.doc_source_id AND newer.status = 'completed'
+                    AND newer.job_id > j.job_id
+              )
+            ORDER BY q.id
+            LIMIT %s;
+        """
+        return db.fetch_all(query, (limit,))
+
+    def fetch_bucket_candidates(self, keys: list[tuple[int, int]]) -> Dict[str, Any]:
+        """
+        Looks up stored questions sharing any of the given (band, bucket) keys.
+        Questions of superseded jobs are left out, so new questions never join a cluster through them.
+        Returns {"buckets": {(band, bucket): [question_id]}, "signatures": {question_id: (signature, cluster_id)}}.
+        """
+        result: Dict[str, Any] = {"buckets": {}, "signatures": {}}
+        if not keys:
+            return result
+
+        query = """
+            SELECT b.band, b.bucket, s.question_id, s.signature, s.cluster_id
+            FROM unnest(%s::smallint[], %s::bigint[]) AS k(band, bucket)
+            JOIN question_lsh_buckets b ON b.band = k.band AND b.bucket = k.bucket
+            JOIN question_signatures s ON s.question_id = b.question_id
+            JOIN extracted_questions q ON q.id = s.question_id
+            JOIN extraction_jobs j ON j.job_id = q.job_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM extraction_jobs newer
+                WHERE newer.doc_source_id = j.doc_source_id AND newer.status = 'completed'
+                  AND newer.job_id > j.job_id
+            );
+        """
+        rows = db.fetch_all(query, ([k[0] for k in keys], [k[1] for k in keys]))
+        for row in rows:
+            result["buckets"].setdefault((row['band'], row['bucket']), []).append(row['question_id'])
+            result["signatures"][row['question_id']] = (bytes(row['signature']), row['cluster_id'])
+        return result
+
+    def save_signatures(self, results: list[tuple[int, bytes, int, list[tuple[int, int]]]]) -> None:
+        """
+        Stores (question_id, signature, cluster_id, band keys) rows in one transaction.
+        """
+        signature_query = """
+            INSERT INTO question_signatures (question_id, signature, cluster_id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (question_id) DO NOTHING;
+        """
+        bucket_query = """
+            INSERT INTO question_lsh_buckets (band, bucket, question_id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT DO NOTHING;
         """
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                for q in questions:
-                    # Construct JSON for alternatives
-                    # q['files'] contains "question": path, "A": path, etc.
-                    files = q.get('files', {})
-                    question_path = files.get('question', '')
-                    alternatives = {k: v for k, v in files.items() if k != 'question'}
-                    
-                    cur.execute(query, (
-                        job_id,
-                        q.get('question_id'),
-                        q.get('status'),
-                        q.get('confidence', 100), # Default 100 if extracted
-                        str(question_path),
-                        json.dumps(alternatives),
-                        q.get('error')
-                    ))
+                cur.executemany(signature_query, [(qid, sig, cluster_id) for qid, sig, cluster_id, _ in results])
+                cur.executemany(bucket_query, [
+                    (band, bucket, qid) for qid, _, _, keys in results for band, bucket in keys
+                ])
                 conn.commit()
 
+    def update_question(self, row: Dict[str, Any], result: Dict[str, Any], document_hash: str) -> None:
+        """
+        Replaces a persisted question with a re-extraction result.
+        If the source document changed, later questions of the same job are shifted by the
+        change in block count. They keep their old document hash: their shifted ranges are only
+        an estimate, checked against their fingerprint when they are re-extracted.
+        """
+        query = """
+            UPDATE extracted_questions
+            SET status = %s, confidence_score = %s, question_path = %s, alternatives_json = %s, error_note = %s,
+                document_hash = %s, block_start = %s, block_end = %s, alternative_ranges = %s,
+                block_fingerprint = %s, question_text = %s, alternatives_text = %s
+            WHERE id = %s;
+        """
+        shift_query = """
+            UPDATE extracted_questions
+            SET block_start = block_start + %s, block_end = block_end + %s
+            WHERE job_id = %s AND id <> %s AND block_start >= %s;
+        """
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, self._question_values(result, document_hash) + (row['id'],))
+
+                # The text may have changed, let the next dedup run hash it again
+                self._delete_signatures(cur, [row['id']])
+
+                if document_hash != row['document_hash']:
+                    delta = result['block_range'][1] - row['block_end']
+                    if delta:
+                        cur.execute(shift_query, (delta, delta, row['job_id'], row['id'], row['block_end']))
+                conn.commit()
+
+    def _delete_signatures(self, cur: Any, question_ids: list[int]) -> None:
+        """
+        Drops the MinHash data of questions about to be replaced.
+        Clusters whose canonical question is among them are re-pointed to their oldest remaining member.
+        """
+        repoint_query = """
+            UPDATE question_signatures s
+            SET cluster_id = heads.new_cluster_id
+            FROM (
+                SELECT cluster_id, MIN(question_id) AS new_cluster_id
+                FROM question_signatures
+                WHERE cluster_id = ANY(%s) AND question_id <> ALL(%s)
+                GROUP BY cluster_id
+            ) heads
+            WHERE s.cluster_id = heads.cluster_id AND s.question_id <> ALL(%s);
+        """
+        cur.execute(repoint_query, (question_ids, question_ids, question_ids))
+        cur.execute("DELETE FROM question_lsh_buckets WHERE question_id = ANY(%s)", (question_ids,))
+        cur.execute("DELETE FROM question_signatures WHERE question_id = ANY(%s)", (question_ids,))
+
+    def _question_values(self, q: Dict[str, Any], document_hash: Optional[str]) -> tuple[Any, ...]:
+        # Construct JSON for alternatives
+        # q['files'] contains "question": path, "A": path, etc.
+        files = q.get('files', {})
+        question_path = files.get('question', '')
+        alternatives = {k: v for k, v in files.items() if k != 'question'}
+        block_start, block_end = q.get('block_range') or (None, None)
+        texts = q.get('text', {})
+        alternatives_text = {k: v for k, v in texts.items() if k != 'question'}
+
+        return (
+            q.get('status'),
+            q.get('confidence', 100), # Default 100 if extracted
+            str(question_path),
+            json.dumps(alternatives),
+            q.get('error'),
+            document_hash,
+            block_start,
+            block_end,
+            json.dumps(q.get('alternative_ranges', {})),
+            q.get('fingerprint'),
+            texts.get('question'),
+            json.dumps(alternatives_text, ensure_ascii=False),
+        )
+
 repository = ExtractionRepository()
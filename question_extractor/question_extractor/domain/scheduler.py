@@ -0,0 +1,257 @@
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from question_extractor.domain.extraction import ExtractionService
+from question_extractor.domain.persistence import JobCheckpoint, repository
+from question_extractor.ooxml.archive import DOCUMENT_PART, DocxArchive
+from question_extractor.ooxml.reader import DocxReader
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+QuestionRange = Tuple[str, int, int]
+
+
+@dataclass(frozen=True)
+class DocumentTask:
+    doc_source_id: str
+    file_path: Path
+    file_size: int
+    xml_size: int # uncompressed word/document.xml, read from the zip central directory
+    parts_size: int # uncompressed size of every part, document.xml and media included
+
+    @property
+    def cost(self) -> int:
+        return self.file_size + self.xml_size
+
+
+def estimate_task(doc_source_id: str, file_path: Path) -> DocumentTask:
+    """
+    Estimates the cost of a document without decompressing it.
+    """
+    with zipfile.ZipFile(file_path, 'r') as source_zip:
+        xml_size = source_zip.getinfo(DOCUMENT_PART).file_size
+        parts_size = sum(item.file_size for item in source_zip.infolist())
+    return DocumentTask(doc_source_id, file_path, file_path.stat().st_size, xml_size, parts_size)
+
+
+@dataclass(frozen=True)
+class Shard:
+    first_block: int # original body block index of the first block in document_xml
+    question_ranges: List[QuestionRange]
+    document_xml: bytes # document.xml whose body holds only the blocks of this shard
+
+
+# Worker entry points, module-level so they can be pickled by the process pool
+
+def _extract_document(doc_source_id: str, file_path: Path, checkpoints: bool) -> Dict[str, Any]:
+    checkpoint = repository.start_job(doc_source_id, file_path) if checkpoints else None
+    return ExtractionService(file_path).extract_all(doc_source_id, checkpoint)
+
+
+def _plan_document(doc_source_id: str, file_path: Path, checkpoints: bool,
+                   shard_count: int) -> Tuple[Dict[str, Any], List[Shard], Optional[JobCheckpoint]]:
+    """
+    Parses the document once and cuts its pending questions into shard documents,
+    so shard workers only parse their own slice of the body.
+    """
+    service = ExtractionService(file_path)
+    checkpoint = repository.start_job(doc_source_id, file_path) if checkpoints else None
+    report = service.new_report(doc_source_id, checkpoint.document_hash if checkpoint else None)
+
+    try:
+        with DocxReader(file_path) as reader:
+            blocks = reader.get_body_blocks()
+            question_ranges = service.find_question_ranges(reader, blocks)
+            if checkpoint:
+                # Questions verified on disk by a previous run are not extracted again
+                for q_id, _, _ in question_ranges:
+                    if q_id in checkpoint.completed:
+                        ExtractionService.add_result(report, checkpoint.completed[q_id])
+                question_ranges = [r for r in question_ranges if r[0] not in checkpoint.completed]
+                # Shards only need the job, not the previous results
+                checkpoint.completed = {}
+
+            service.segmenter.use_document(reader.document_xml)
+            shards = []
+            for shard_ranges in split_shards(question_ranges, shard_count):
+                first_block, last_block = shard_ranges[0][1], shard_ranges[-1][2]
+                document_xml = service.segmenter.render_document_xml(blocks[first_block:last_block])
+                shards.append(Shard(first_block, shard_ranges, document_xml))
+    except Exception as e:
+        logger.error(f"Planning failed for {doc_source_id}: {e}")
+        if checkpoint:
+            checkpoint.fail(str(e))
+        raise
+    return report, shards, checkpoint
+
+
+def _extract_shard(doc_source_id: str, file_path: Path, shard: Shard,
+                   checkpoint: Optional[JobCheckpoint]) -> List[Dict[str, Any]]:
+    archive = DocxArchive.load(file_path, shard.document_xml)
+    return ExtractionService(file_path, archive).extract_ranges(
+        doc_source_id, shard.question_ranges, checkpoint, shard.first_block
+    )
+
+
+def split_shards(question_ranges: List[QuestionRange], count: int) -> List[List[QuestionRange]]:
+    """
+    Splits question ranges into at most `count` contiguous shards of similar block counts.
+    Cuts fall where the running block total passes k * total / count; each question goes
+    to the shard its midpoint falls in.
+    """
+    if not question_ranges:
+        return []
+    count = min(count, len(question_ranges))
+    total = sum(end - start for _, start, end in question_ranges)
+
+    shards: List[List[QuestionRange]] = [[] for _ in range(count)]
+    running = 0
+    for question_range in question_ranges:
+        size = question_range[2] - question_range[1]
+        shards[min((2 * running + size) * count // (2 * total), count - 1)].append(question_range)
+        running += size
+    # A question larger than a whole share leaves the shards it spans empty
+    return [shard for shard in shards if shard]
+
+
+@dataclass
+class _Unit:
+    kind: str # 'document', 'plan' or 'shard'
+    task: DocumentTask
+    shard: Optional[Shard] = None
+    checkpoint: Optional[JobCheckpoint] = None
+
+
+class BatchScheduler:
+    """
+    Runs document extractions on a process pool, longest documents first.
+
+    - Each running unit reserves an estimated memory footprint (parsed document.xml size x factor,
+      plus the uncompressed package parts it keeps in memory).
+      Units start in priority order while the total stays within the budget; a unit that does not
+      fit blocks the ones behind it, so smaller units cannot keep it waiting indefinitely.
+    - Documents whose document.xml exceeds shard_min_xml are parsed once by a plan unit and cut
+      into shard documents, one per question range shard, extracted in parallel.
+    - With checkpoints, every document runs as a resumable job; shards of one document
+      share its job and skip the questions a previous run already completed.
+    """
+    def __init__(self, workers: int, memory_budget: int, memory_factor: int, shard_min_xml: int,
+                 checkpoints: bool = False):
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.memory_factor = memory_factor
+        self.shard_min_xml = shard_min_xml
+        self.checkpoints = checkpoints
+
+    def memory(self, unit: _Unit) -> int:
+        """
+        Parsed document.xml (size x factor) plus the package parts held as bytes (DocxArchive).
+        A shard only parses its own slice of the body, but holds every other part of the package.
+        """
+        task = unit.task
+        xml_size = len(unit.shard.document_xml) if unit.shard else task.xml_size
+        return xml_size * self.memory_factor + xml_size + task.parts_size - task.xml_size
+
+    def queue(self, tasks: List[DocumentTask]) -> Deque[_Unit]:
+        return deque(
+            _Unit('plan' if task.xml_size >= self.shard_min_xml else 'document', task)
+            for task in sorted(tasks, key=lambda t: t.cost, reverse=True)
+        )
+
+    def admit(self, queue: Deque[_Unit], reserved: int, running: int) -> List[_Unit]:
+        """
+        Pops the units that can start now from the head of the queue.
+        """
+        admitted = []
+        while queue and running + len(admitted) < self.workers:
+            memory = self.memory(queue[0])
+            # A unit larger than the whole budget still runs, alone
+            if (running or admitted) and reserved + memory > self.memory_budget:
+                break
+            admitted.append(queue.popleft())
+            reserved += memory
+        return admitted
+
+    def run(self, tasks: List[DocumentTask]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one report per successfully extracted document, in completion order.
+        """
+        queue = self.queue(tasks)
+        # doc_source_id -> {"report": ..., "remaining": shards not finished, "checkpoint": ...}
+        sharded: Dict[str, Dict[str, Any]] = {}
+        failed: set[str] = set()
+        running: Dict[Future[Any], Tuple[_Unit, int]] = {}
+        reserved = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while queue or running:
+                # Sharded jobs commit nothing while their shards wait, keep their lease alive
+                checkpoints = [state["checkpoint"] for state in sharded.values() if state["checkpoint"]]
+                for checkpoint in checkpoints:
+                    checkpoint.renew()
+
+                for unit in self.admit(queue, reserved, len(running)):
+                    memory = self.memory(unit)
+                    running[self._submit(executor, unit)] = (unit, memory)
+                    reserved += memory
+
+                # Wake up in time to renew the leases even if no unit finishes
+                timeout = min((c.lease_seconds / 2 for c in checkpoints), default=None)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit, memory = running.pop(future)
+                    reserved -= memory
+                    doc_source_id = unit.task.doc_source_id
+
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        logger.error(f"Extraction failed for {doc_source_id} ({unit.kind}): {e}")
+                        if unit.checkpoint and doc_source_id not in failed:
+                            # Committed shard batches stay, a rerun resumes from them
+                            repository.update_job_status(unit.checkpoint.job_id, "failed", str(e))
+                        failed.add(doc_source_id)
+                        sharded.pop(doc_source_id, None)
+                        continue
+
+                    if unit.kind == 'document':
+                        yield outcome
+                    elif unit.kind == 'plan':
+                        report, shards, checkpoint = outcome
+                        logger.info(f"Splitting {doc_source_id} into {len(shards)} shards")
+                        if not shards:
+                            if checkpoint:
+                                checkpoint.finish()
+                            yield report
+                            continue
+                        sharded[doc_source_id] = {"report": report, "remaining": len(shards), "checkpoint": checkpoint}
+                        # Shards go first: they belong to the largest documents
+                        for shard in reversed(shards):
+                            queue.appendleft(_Unit('shard', unit.task, shard, checkpoint))
+                    elif doc_source_id not in failed:
+                        state = sharded[doc_source_id]
+                        for result in outcome:
+                            ExtractionService.add_result(state["report"], result)
+                        state["remaining"] -= 1
+                        if state["remaining"] == 0:
+                            state = sharded.pop(doc_source_id)
+                            if state["checkpoint"]:
+                                # Rows were committed by the shards, only the status is left
+                                state["checkpoint"].finish()
+                            report = state["report"]
+                            report["questions"].sort(key=lambda q: q["question_id"])
+                            yield report
+
+    def _submit(self, executor: ProcessPoolExecutor, unit: _Unit) -> Future[Any]:
+        task = unit.task
+        if unit.kind == 'document':
+            return executor.submit(_extract_document, task.doc_source_id, task.file_path, self.checkpoints)
+        if unit.kind == 'plan':
+            return executor.submit(_plan_document, task.doc_source_id, task.file_path, self.checkpoints, self.workers)
+        return executor.submit(_extract_shard, task.doc_source_id, task.file_path, unit.shard, unit.checkpoint)
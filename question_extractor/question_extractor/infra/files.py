@@ -1,5 +1,7 @@
+import hashlib
 import logging
 import shutil
+import zipfile
 from pathlib import Path
 from typing import Optional
 from .settings import settings
@@ -28,6 +30,22 @@ class FileManager:
         full_path = self.base_path / clean_path
         return full_path
 
+    def hash_file(self, path: Path) -> str:
+        """
+        Returns the SHA-256 hex digest of a file, read in chunks.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def is_valid_output(self, path: Path) -> bool:
+        """
+        Checks that a generated DOCX exists, is not empty and has a readable zip directory.
+        """
+        return path.is_file() and path.stat().st_size > 0 and zipfile.is_zipfile(path)
+
     def get_output_dir(self, doc_source_id: str, question_id: str) -> Path:
         """
         Returns the specific directory for a question's outputs.
@@ -0,0 +1,8 @@
+ALTER TABLE extraction_jobs
+    ADD COLUMN IF NOT EXISTS source_path VARCHAR(1000);
+
+ALTER TABLE extracted_questions
+    ADD COLUMN IF NOT EXISTS document_hash VARCHAR(64), -- sha256 of the source DOCX
+    ADD COLUMN IF NOT EXISTS block_start INTEGER, -- body block index of the question start
+    ADD COLUMN IF NOT EXISTS block_end INTEGER, -- exclusive
+    ADD COLUMN IF NOT EXISTS alternative_ranges JSONB; -- {"A": [start, end]} relative to block_start
@@ -0,0 +1,4 @@
+CREATE INDEX IF NOT EXISTS idx_extracted_questions_job_id ON extracted_questions (job_id);
+CREATE INDEX IF NOT EXISTS idx_extracted_questions_status ON extracted_questions (status);
+CREATE INDEX IF NOT EXISTS idx_extracted_questions_question_identifier ON extracted_questions (question_identifier);
+CREATE INDEX IF NOT EXISTS idx_extraction_jobs_doc_source_id ON extraction_jobs (doc_source_id);
@@ -0,0 +1,12 @@
+ALTER TABLE extracted_questions
+    ADD COLUMN IF NOT EXISTS question_text TEXT,
+    ADD COLUMN IF NOT EXISTS alternatives_text JSONB; -- {"A": "texto..."}
+
+-- Question text weighs more than alternatives when ranking
+ALTER TABLE extracted_questions
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese'::regconfig, COALESCE(question_text, '')), 'A') ||
+        setweight(to_tsvector('portuguese'::regconfig, COALESCE(alternatives_text, '{}'::jsonb)), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_extracted_questions_search ON extracted_questions USING GIN (search_vector);
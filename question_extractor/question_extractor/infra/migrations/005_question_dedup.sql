@@ -0,0 +1,19 @@
+-- question_id references extracted_questions(id). No foreign key: once the table
+-- is partitioned its primary key is (id, job_id).
+CREATE TABLE IF NOT EXISTS question_signatures (
+    question_id INTEGER PRIMARY KEY,
+    signature BYTEA NOT NULL, -- MinHash, little-endian uint32 per permutation (empty when no text)
+    cluster_id INTEGER NOT NULL, -- id of the canonical question
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_signatures_cluster_id ON question_signatures (cluster_id);
+
+CREATE TABLE IF NOT EXISTS question_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, question_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_lsh_buckets_question_id ON question_lsh_buckets (question_id);
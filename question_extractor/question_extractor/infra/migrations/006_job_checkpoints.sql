@@ -0,0 +1,6 @@
+ALTER TABLE extraction_jobs
+    ADD COLUMN IF NOT EXISTS document_hash VARCHAR(64), -- sha256 of the source DOCX, a job resumes only on the same file
+    ADD COLUMN IF NOT EXISTS last_block_index INTEGER, -- last body block of a committed question
+    ADD COLUMN IF NOT EXISTS questions_completed INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_extraction_jobs_resume ON extraction_jobs (doc_source_id, document_hash, status);
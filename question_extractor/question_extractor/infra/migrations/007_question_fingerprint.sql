@@ -0,0 +1,2 @@
+ALTER TABLE extracted_questions
+    ADD COLUMN IF NOT EXISTS block_fingerprint VARCHAR(64); -- sha256 of the question id and numbering marker at block_start
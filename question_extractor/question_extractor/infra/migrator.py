@@ -0,0 +1,270 @@
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List
+import psycopg
+from psycopg import sql
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Arbitrary key for pg_advisory_lock, serializes concurrent `migrate` runs
+MIGRATION_LOCK_ID = 742001
+
+PARTITIONED_TABLE = "extracted_questions"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+class MigrationRunner:
+    """
+    Applies numbered SQL files (NNN_name.sql) in order and records them in schema_migrations.
+    Each migration runs in its own transaction; applied ones are skipped on later runs.
+    """
+    def __init__(self, migrations_dir: Path = MIGRATIONS_DIR):
+        self.migrations_dir = migrations_dir
+
+    def discover(self) -> List[Migration]:
+        migrations = []
+        for path in self.migrations_dir.glob("*.sql"):
+            match = MIGRATION_FILE_PATTERN.match(path.name)
+            if not match:
+                logger.warning(f"Ignoring migration with unexpected name: {path.name}")
+                continue
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+        migrations.sort(key=lambda m: m.version)
+        versions = [m.version for m in migrations]
+        if len(versions) != len(set(versions)):
+            raise ValueError(f"Duplicate migration versions in {self.migrations_dir}")
+        return migrations
+
+    def run(self) -> List[Migration]:
+        """
+        Applies pending migrations. Returns the ones applied by this run.
+        """
+        migrations = self.discover()
+        applied_now = []
+
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                # Session lock, released when the connection closes
+                cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name VARCHAR(255) NOT NULL,
+                        checksum VARCHAR(64) NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                conn.commit()
+
+                cur.execute("SELECT version, checksum FROM schema_migrations")
+                applied = {row['version']: row['checksum'] for row in cur.fetchall()}
+
+                for migration in migrations:
+                    if migration.version in applied:
+                        if applied[migration.version] != migration.checksum:
+                            logger.warning(f"Migration {migration.path.name} changed after being applied")
+                        continue
+
+                    logger.info(f"Applying migration {migration.path.name}...")
+                    try:
+                        cur.execute(migration.sql)
+                        cur.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                            (migration.version, migration.name, migration.checksum)
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    applied_now.append(migration)
+
+                if self.is_partitioned(cur):
+                    self.ensure_partitions(cur)
+                    conn.commit()
+
+        return applied_now
+
+    def is_partitioned(self, cur: psycopg.Cursor[Any]) -> bool:
+        cur.execute("""
+            SELECT c.relkind
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relname = %s;
+        """, (PARTITIONED_TABLE,))
+        row = cur.fetchone()
+        return row is not None and row['relkind'] == 'p'
+
+    def partition_questions(self) -> bool:
+        """
+        Converts extracted_questions into a table range-partitioned by job_id.
+        Returns False if it was already partitioned.
+        """
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+                if self.is_partitioned(cur):
+                    self.ensure_partitions(cur)
+                    conn.commit()
+                    return False
+
+                try:
+                    self._convert_to_partitioned(cur)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        return True
+
+    def _convert_to_partitioned(self, cur: psycopg.Cursor[Any]) -> None:
+        table = sql.Identifier(PARTITIONED_TABLE)
+        old_table = sql.Identifier(f"{PARTITIONED_TABLE}_unpartitioned")
+
+        # Rows without a job cannot be placed in any range, never drop them silently
+        cur.execute(sql.SQL("SELECT count(*) AS orphans FROM {} WHERE job_id IS NULL").format(table))
+        orphans = cur.fetchone()['orphans']
+        if orphans:
+            raise RuntimeError(
+                f"{orphans} extracted_questions rows have no job_id. "
+                "Assign them to a job or delete them before partitioning."
+            )
+
+        # Secondary indexes are recreated on the new table with the same definitions
+        cur.execute("""
+            SELECT i.indexdef
+            FROM pg_indexes i
+            WHERE i.schemaname = 'public' AND i.tablename = %s
+              AND i.indexname NOT IN (
+                  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'
+              );
+        """, (PARTITIONED_TABLE, PARTITIONED_TABLE))
+        index_defs = [row['indexdef'] for row in cur.fetchall()]
+
+        columns = self._copy_columns(cur)
+
+        # Keep the id sequence alive when the old table is dropped
+        cur.execute("SELECT pg_get_serial_sequence(%s, 'id') AS seq", (PARTITIONED_TABLE,))
+        sequence = cur.fetchone()['seq']
+        cur.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY NONE").format(sql.SQL(sequence)))
+
+        cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(table, old_table))
+        cur.execute(sql.SQL("""
+            CREATE TABLE {} (
+                LIKE {} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS
+            ) PARTITION BY RANGE (job_id)
+        """).format(table, old_table))
+        cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} DEFAULT").format(
+            sql.Identifier(f"{PARTITIONED_TABLE}_default"), table
+        ))
+        # Range partitions must exist before the copy, otherwise every row lands in the
+        # default partition and ensure_partitions can never split those ranges off
+        self.ensure_partitions(cur)
+
+        cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+            table, columns, columns, old_table
+        ))
+
+        cur.execute(sql.SQL("DROP TABLE {}").format(old_table))
+        # Added after the drop so the constraint can reuse the old index names.
+        # The partition key must be part of the primary key.
+        cur.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY (id, job_id)").format(table))
+        cur.execute(sql.SQL(
+            "ALTER TABLE {} ADD FOREIGN KEY (job_id) REFERENCES extraction_jobs(job_id)"
+        ).format(table))
+        cur.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY {}").format(
+            sql.SQL(sequence), sql.Identifier(PARTITIONED_TABLE, "id")
+        ))
+        for index_def in index_defs:
+            cur.execute(index_def)
+
+        logger.info("extracted_questions is now partitioned by job_id")
+
+    def _copy_columns(self, cur: psycopg.Cursor[Any]) -> sql.Composable:
+        # Generated columns cannot be copied explicitly
+        cur.execute("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s AND is_generated = 'NEVER'
+            ORDER BY ordinal_position;
+        """, (PARTITIONED_TABLE,))
+        return sql.SQL(", ").join(sql.Identifier(row['column_name']) for row in cur.fetchall())
+
+    def ensure_partitions(self, cur: psycopg.Cursor[Any]) -> None:
+        """
+        Creates range partitions up to QUESTIONS_PARTITIONS_AHEAD past the newest job.
+        Jobs created beyond that horizon before the next `migrate` land in the default partition;
+        their rows are moved into the range partition once it is created.
+        """
+        from .settings import settings
+
+        table = sql.Identifier(PARTITIONED_TABLE)
+        default = sql.Identifier(f"{PARTITIONED_TABLE}_default")
+        width = settings.QUESTIONS_PARTITION_SIZE
+        cur.execute("SELECT COALESCE(MAX(job_id), 0) AS max_job FROM extraction_jobs")
+        last = cur.fetchone()['max_job'] // width + settings.QUESTIONS_PARTITIONS_AHEAD
+
+        missing = []
+        for n in range(last + 1):
+            cur.execute("SELECT to_regclass(%s) AS rel", (f"public.{PARTITIONED_TABLE}_p{n}",))
+            if cur.fetchone()['rel'] is None:
+                missing.append(n)
+        if not missing:
+            return
+
+        taken = []
+        for n in missing:
+            cur.execute(sql.SQL(
+                "SELECT EXISTS (SELECT 1 FROM {} WHERE job_id >= %s AND job_id < %s) AS taken"
+            ).format(default), (n * width, (n + 1) * width))
+            if cur.fetchone()['taken']:
+                taken.append(n)
+
+        # A range cannot be created while the default partition holds rows for it:
+        # detach the default, create the ranges, move the rows and attach it back
+        if taken:
+            logger.info(f"Moving rows of {len(taken)} ranges out of the default partition")
+            cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(table, default))
+
+        for n in missing:
+            name = f"{PARTITIONED_TABLE}_p{n}"
+            # DDL cannot take bind parameters, bounds are inlined as literals
+            cur.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                sql.Identifier(name), table, sql.Literal(n * width), sql.Literal((n + 1) * width)
+            ))
+            logger.info(f"Created partition {name}")
+
+        if taken:
+            columns = self._copy_columns(cur)
+            for n in taken:
+                # Inserted through the parent, routed to the new range partition
+                cur.execute(sql.SQL("""
+                    WITH moved AS (
+                        DELETE FROM {} WHERE job_id >= %s AND job_id < %s RETURNING {}
+                    )
+                    INSERT INTO {} ({}) SELECT {} FROM moved
+                """).format(default, columns, table, columns, columns), (n * width, (n + 1) * width))
+            cur.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} DEFAULT").format(table, default))
+
+
+migration_runner = MigrationRunner()
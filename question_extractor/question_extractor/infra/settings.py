@@ -28,11 +28,38 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: Optional[RedisDsn] = None
     WORKER_CONCURRENCY: int = 4
 
+    # Batch scheduling
+    SCHEDULER_MEMORY_BUDGET_MB: int = 4096
+    SCHEDULER_XML_MEMORY_FACTOR: int = 10 # estimated parse memory per byte of document.xml
+    SCHEDULER_SHARD_MIN_XML_MB: int = 50 # larger documents are split into question shards
+
+    # Daemon
+    DAEMON_HOST: str = "127.0.0.1"
+    DAEMON_PORT: int = 8765
+    DAEMON_WORKERS: int = 4
+    DAEMON_MAX_QUEUE: int = 32
+    DAEMON_ARCHIVE_CACHE_MB: int = 512 # total uncompressed size of cached documents
+
+    # Schema
+    QUESTIONS_PARTITION_SIZE: int = 10000 # jobs per extracted_questions partition
+    QUESTIONS_PARTITIONS_AHEAD: int = 2
+
     # Parsing
     EXPECTED_ALTERNATIVES: int = 4
     ALLOW_VARIABLE_ALTERNATIVES: bool = True
     CONFIDENCE_THRESHOLD_NEEDS_REVIEW: int = 70
 
+    # Deduplication
+    DEDUP_NUM_PERM: int = 128 # changing it invalidates stored signatures
+    DEDUP_BANDS: int = 16
+    DEDUP_SHINGLE_SIZE: int = 3 # words
+    DEDUP_THRESHOLD: float = 0.8
+    DEDUP_BATCH_SIZE: int = 500
+
+    # Checkpointing
+    CHECKPOINT_BATCH_SIZE: int = 50 # questions per commit
+    JOB_LEASE_SECONDS: int = 600 # a processing job without progress for this long is taken over
+
     # Report
     REPORT_FORMAT: str = "html"
     REPORT_FILENAME: str = "report.html"
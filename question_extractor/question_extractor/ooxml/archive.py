@@ -0,0 +1,86 @@
+import zipfile
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_PART = 'word/document.xml'
+
+class DocxArchive:
+    """
+    In-memory snapshot of a DOCX package.
+    Every part is read once so segments can be written without reopening the source zip.
+    """
+    def __init__(self, path: Path, entries: List[Tuple[zipfile.ZipInfo, bytes]]):
+        self.path = path
+        self.entries = entries
+        self.size = sum(len(data) for _, data in entries)
+
+    @classmethod
+    def load(cls, path: Path, document_xml: Optional[bytes] = None) -> "DocxArchive":
+        """
+        Reads every part of the package. A given document_xml replaces the one in the file,
+        which is then not decompressed at all.
+        """
+        with zipfile.ZipFile(path, 'r') as source_zip:
+            entries = [
+                (item, document_xml if document_xml is not None and item.filename == DOCUMENT_PART
+                 else source_zip.read(item.filename))
+                for item in source_zip.infolist()
+            ]
+        return cls(path, entries)
+
+    @property
+    def document_xml(self) -> bytes:
+        for item, data in self.entries:
+            if item.filename == DOCUMENT_PART:
+                return data
+        raise ValueError(f"File {self.path} does not contain {DOCUMENT_PART}")
+
+
+class ArchiveCache:
+    """
+    Thread-safe LRU cache of DocxArchive snapshots, bounded by their total size in bytes.
+    Entries are keyed by path, mtime and size so an edited source file is reloaded.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], DocxArchive]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> DocxArchive:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            archive = self._entries.get(key)
+            if archive is not None:
+                self._entries.move_to_end(key)
+                return archive
+
+        # Load outside the lock so a large file does not block cache hits
+        archive = DocxArchive.load(path)
+
+        if archive.size > self.max_bytes:
+            # Caching it would evict everything else and still exceed the budget
+            logger.debug(f"Archive larger than cache budget, not cached: {path}")
+            return archive
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = archive
+                self.total_bytes += archive.size
+            self._entries.move_to_end(key)
+            while self.total_bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                logger.debug(f"Evicted archive from cache: {evicted_key[0]}")
+        return archive
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
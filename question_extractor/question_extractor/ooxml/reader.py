@@ -3,6 +3,7 @@ from lxml import etree
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import logging
+from .archive import DocxArchive
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +15,18 @@ NAMESPACES = {
 }
 
 class DocxReader:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, archive: Optional[DocxArchive] = None):
         self.path = path
+        self.archive = archive
         self.zip_file: Optional[zipfile.ZipFile] = None
         self.document_xml: Optional[etree._Element] = None
         self.body: Optional[etree._Element] = None
 
     def __enter__(self):
+        if self.archive is not None:
+            # Parts are already in memory, no need to open the zip
+            self.parse_document_xml(self.archive.document_xml)
+            return self
         self.zip_file = zipfile.ZipFile(self.path, 'r')
         self.read_document_xml()
         return self
@@ -35,12 +41,15 @@ class DocxReader:
         
         try:
             xml_content = self.zip_file.read('word/document.xml')
-            self.document_xml = etree.fromstring(xml_content)
-            self.body = self.document_xml.find("w:body", NAMESPACES)
-            if self.body is None:
-                raise ValueError("Could not find w:body in document.xml")
         except KeyError:
             raise ValueError(f"File {self.path} does not contain word/document.xml")
+        self.parse_document_xml(xml_content)
+
+    def parse_document_xml(self, xml_content: bytes):
+        self.document_xml = etree.fromstring(xml_content)
+        self.body = self.document_xml.find("w:body", NAMESPACES)
+        if self.body is None:
+            raise ValueError("Could not find w:body in document.xml")
 
     def get_paragraphs(self) -> List[etree._Element]:
         if self.body is None:
@@ -6,13 +6,75 @@ from lxml import etree
 from io import BytesIO
 from typing import List, Optional
 from .reader import NAMESPACES
+from .archive import DocxArchive, DOCUMENT_PART
 import copy
 
 logger = logging.getLogger(__name__)
 
 class DocxSegmenter:
-    def __init__(self, original_path: Path):
+    def __init__(self, original_path: Path, archive: Optional[DocxArchive] = None):
         self.original_path = original_path
+        self._archive = archive
+        self._skeleton: Optional[etree._Element] = None
+        self._sect_pr: Optional[etree._Element] = None
+
+    @property
+    def archive(self) -> DocxArchive:
+        # Read the source package once instead of once per segment
+        if self._archive is None:
+            self._archive = DocxArchive.load(self.original_path)
+        return self._archive
+
+    def _get_skeleton(self) -> etree._Element:
+        """
+        Returns the original document.xml root with an empty body, parsing it if no reader did.
+        """
+        if self._skeleton is None:
+            self.use_document(etree.fromstring(self.archive.document_xml))
+        return self._skeleton
+
+    def use_document(self, root: etree._Element) -> None:
+        """
+        Builds the skeleton from an already parsed document.xml root, so the document is parsed once.
+        The root is left untouched.
+        """
+        if self._skeleton is not None:
+            return
+        body = root.find("w:body", NAMESPACES)
+        
+        if body is None:
+            raise ValueError("Target DOCX has no body")
+        
+        # Requirement: "garantir w:sectPr final para integridade"
+        sect_pr = body.find("w:sectPr", NAMESPACES)
+        self._sect_pr = copy.deepcopy(sect_pr) if sect_pr is not None else None
+        
+        # Copy everything but the body content
+        skeleton = etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+        for child in root:
+            if child is body:
+                etree.SubElement(skeleton, body.tag, attrib=dict(body.attrib))
+            else:
+                skeleton.append(copy.deepcopy(child))
+        self._skeleton = skeleton
+
+    def render_document_xml(self, elements: List[etree._Element]) -> bytes:
+        """
+        Serializes a document.xml whose body holds only the given elements (plus the final sectPr).
+        """
+        root = copy.deepcopy(self._get_skeleton())
+        body = root.find("w:body", NAMESPACES)
+        
+        # Append selected elements
+        for elem in elements:
+            # lxml moves elements on append, so we copy them
+            body.append(copy.deepcopy(elem))
+        
+        # Restore sectPr
+        if self._sect_pr is not None:
+            body.append(copy.deepcopy(self._sect_pr))
+            
+        return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
 
     def create_subdocument(self, output_path: Path, elements: List[etree._Element]) -> None:
         """
@@ -22,46 +84,14 @@ class DocxSegmenter:
         # Create a buffer for the new zip
         buffer = BytesIO()
         
-        with zipfile.ZipFile(self.original_path, 'r') as source_zip:
-            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as target_zip:
-                # Copy all files except word/document.xml
-                for item in source_zip.infolist():
-                    if item.filename != 'word/document.xml':
-                        target_zip.writestr(item, source_zip.read(item.filename))
-                
-                # Construct new document.xml
-                # Read original to keep root structure
-                orig_xml_content = source_zip.read('word/document.xml')
-                root = etree.fromstring(orig_xml_content)
-                body = root.find("w:body", NAMESPACES)
-                
-                if body is None:
-                    raise ValueError("Target DOCX has no body")
-                
-                # Clear existing body children
-                # We want to preserve sectPr if it exists at the end?
-                # Usually sectPr is the last child of body.
-                # Requirement: "garantir w:sectPr final para integridade"
-                
-                sect_pr = body.find("w:sectPr", NAMESPACES)
-                
-                # Clear body
-                for child in list(body):
-                    body.remove(child)
-                
-                # Append selected elements
-                for elem in elements:
-                    # We might need to handle deepcopy if we are modifying attributes?
-                    # For now, just append check if it works (lxml moves it, so we should copy)
-                    body.append(copy.deepcopy(elem))
-                
-                # Restore sectPr
-                if sect_pr is not None:
-                    body.append(copy.deepcopy(sect_pr))
-                    
-                # serialized
-                new_xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
-                target_zip.writestr('word/document.xml', new_xml)
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as target_zip:
+            # Copy all files except word/document.xml
+            for item, data in self.archive.entries:
+                if item.filename != DOCUMENT_PART:
+                    target_zip.writestr(item, data)
+            
+            # New document.xml from the cached root structure
+            target_zip.writestr(DOCUMENT_PART, self.render_document_xml(elements))
         
         # Write buffer to disk
         with open(output_path, 'wb') as f:
@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict
+from question_extractor.domain.extraction import ExtractionService
+from question_extractor.domain.persistence import repository
+from question_extractor.domain.reporting import ReportGenerator
+from question_extractor.infra.files import file_manager
+from question_extractor.infra.settings import settings
+from question_extractor.ooxml.archive import ArchiveCache
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class ExtractionDaemon:
+    """
+    Keeps the extraction pipeline warm between requests.
+    Jobs run on a bounded worker pool; at most `max_queue` jobs may wait for a worker.
+    """
+    def __init__(self, workers: int, max_queue: int, cache_bytes: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+        self.cache = ArchiveCache(cache_bytes)
+        # Jinja environment is built once and shared by all requests
+        self.report_generator = ReportGenerator()
+
+    def submit(self, doc_source_id: str, generate_report: bool = False) -> "Future[Dict[str, Any]]":
+        if not self.slots.acquire(blocking=False):
+            raise QueueFullError("Extraction queue is full")
+        try:
+            future = self.executor.submit(self.extract, doc_source_id, generate_report)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def extract(self, doc_source_id: str, generate_report: bool = False) -> Dict[str, Any]:
+        file_path = file_manager.resolve_path(f"{doc_source_id}.docx")
+        if not file_path.exists():
+            raise FileNotFoundError(f"File missing: {file_path}")
+
+        archive = self.cache.get(file_path)
+        service = ExtractionService(file_path, archive)
+        checkpoint = repository.start_job(doc_source_id, file_path) if settings.WRITE_DB_RESULTS else None
+        report_data = service.extract_all(doc_source_id, checkpoint)
+
+        if generate_report:
+            # generate_html rewrites paths in place, keep the absolute ones for the response
+            self.report_generator.generate_html(dict(report_data))
+        return report_data
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], extraction: ExtractionDaemon):
+        super().__init__(address, DaemonRequestHandler)
+        self.extraction = extraction
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    server: DaemonServer
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        self.send_json(HTTPStatus.OK, {
+            "status": "ok",
+            "cached_archives": len(self.server.extraction.cache),
+            "cached_bytes": self.server.extraction.cache.total_bytes,
+        })
+
+    def do_POST(self) -> None:
+        if self.path != "/extract":
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            doc_source_id = str(payload["doc_source_id"])
+        except (ValueError, KeyError, TypeError):
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Expected JSON body with doc_source_id"})
+            return
+
+        # doc_source_id is a file name, never a path
+        if not doc_source_id or Path(doc_source_id).name != doc_source_id:
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": f"Invalid doc_source_id: {doc_source_id}"})
+            return
+
+        try:
+            future = self.server.extraction.submit(doc_source_id, bool(payload.get("report", False)))
+            report_data = future.result()
+        except QueueFullError as e:
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+            return
+        except FileNotFoundError as e:
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Extraction failed for {doc_source_id}: {e}")
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+
+        self.send_json(HTTPStatus.OK, report_data)
+
+    def send_json(self, status: HTTPStatus, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+
+def serve(host: str, port: int) -> None:
+    """
+    Runs the extraction daemon until interrupted.
+    """
+    extraction = ExtractionDaemon(
+        workers=settings.DAEMON_WORKERS,
+        max_queue=settings.DAEMON_MAX_QUEUE,
+        cache_bytes=settings.DAEMON_ARCHIVE_CACHE_MB * 1024 * 1024,
+    )
+    server = DaemonServer((host, port), extraction)
+    logger.info(f"Extraction daemon listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down extraction daemon...")
+    finally:
+        server.server_close()
+        extraction.shutdown()
@@ -0,0 +1,82 @@
+import os
+from contextlib import contextmanager
+import pytest
+
+# Settings are loaded at import time and require a database configuration.
+# Unit tests never connect, any value is enough.
+for key, value in {
+    "PG_HOST": "localhost",
+    "PG_DB": "question_extractor_test",
+    "PG_USER": "test",
+    "PG_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+# Imported once the environment is set
+from question_extractor.infra.db import db # noqa: E402
+
+
+class FakeDatabase:
+    """
+    Records executed statements instead of talking to Postgres.
+    `respond(fragment, rows)` sets the rows returned after a statement containing fragment;
+    rows may be a function of the statement parameters.
+    """
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+        self.responses = []
+        self.rows = []
+
+    def respond(self, fragment, rows):
+        self.responses.append((fragment, rows))
+
+    def statements(self, fragment):
+        return [params for query, params in self.executed if fragment in query]
+
+    # Cursor and connection protocol
+    def execute(self, query, params=None):
+        if not isinstance(query, str):
+            query = query.as_string(None)
+        query = " ".join(query.split())
+        self.executed.append((query, params))
+        rows = next((rows for fragment, rows in self.responses if fragment in query), [])
+        self.rows = rows(params) if callable(rows) else rows
+
+    def executemany(self, query, params_seq):
+        for params in params_seq:
+            self.execute(query, params)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDatabase()
+
+    @contextmanager
+    def get_connection():
+        yield fake
+
+    monkeypatch.setattr(db, "get_connection", get_connection)
+    return fake
@@ -0,0 +1,27 @@
+import zipfile
+from pathlib import Path
+from typing import List
+from question_extractor.ooxml.archive import DOCUMENT_PART
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+TABLE = "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>1</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+
+
+def make_docx(path: Path, paragraphs: List[str]) -> Path:
+    """
+    Writes a minimal DOCX with one paragraph per string. "<table>" inserts a one-cell table.
+    """
+    body = "".join(
+        TABLE if text == "<table>" else f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs
+    )
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr("[Content_Types].xml", "<Types/>")
+        docx.writestr(DOCUMENT_PART, f'<w:document xmlns:w="{W_NS}"><w:body>{body}<w:sectPr/></w:body></w:document>')
+    return path
+
+
+def questions(count: int) -> List[str]:
+    paragraphs = []
+    for n in range(1, count + 1):
+        paragraphs += [f"{n}. Enunciado da questão {n}", f"A) Primeira {n}", f"B) Segunda {n}"]
+    return paragraphs
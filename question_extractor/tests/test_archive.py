@@ -0,0 +1,54 @@
+import os
+import zipfile
+from pathlib import Path
+from question_extractor.ooxml.archive import ArchiveCache, DocxArchive, DOCUMENT_PART
+
+
+def make_docx(path: Path, payload_size: int) -> Path:
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr(DOCUMENT_PART, b"<w:document/>")
+        docx.writestr("word/media/image1.png", b"x" * payload_size)
+    return path
+
+
+def test_archive_size_counts_uncompressed_parts(tmp_path):
+    archive = DocxArchive.load(make_docx(tmp_path / "a.docx", 1000))
+    assert archive.size == 1000 + len(b"<w:document/>")
+    assert archive.document_xml == b"<w:document/>"
+
+
+def test_cache_returns_same_snapshot_until_file_changes(tmp_path):
+    path = make_docx(tmp_path / "a.docx", 10)
+    cache = ArchiveCache(max_bytes=10_000)
+
+    first = cache.get(path)
+    assert cache.get(path) is first
+
+    make_docx(path, 20)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert cache.get(path) is not first
+
+
+def test_cache_evicts_least_recently_used_by_total_bytes(tmp_path):
+    paths = [make_docx(tmp_path / f"{name}.docx", 1000) for name in "abc"]
+    cache = ArchiveCache(max_bytes=2100)
+
+    a = cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0]) # a becomes most recently used
+    cache.get(paths[2]) # over budget, b is evicted
+
+    assert len(cache) == 2
+    assert cache.total_bytes <= 2100
+    assert cache.get(paths[0]) is a
+
+
+def test_cache_skips_archives_larger_than_budget(tmp_path):
+    cache = ArchiveCache(max_bytes=500)
+    small = make_docx(tmp_path / "small.docx", 10)
+    cache.get(small)
+
+    cache.get(make_docx(tmp_path / "big.docx", 1000))
+
+    assert len(cache) == 1
+    assert cache.total_bytes == cache.get(small).size
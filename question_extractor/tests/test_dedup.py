@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from question_extractor.domain.dedup import DedupService, MinHasher, question_parts
+
+QUESTION = "Qual é a principal função da clorofila no processo de fotossíntese das plantas verdes?"
+ALTERNATIVES = {
+    "A": "A) Absorver a energia luminosa",
+    "B": "B) Armazenar amido nas raízes",
+    "C": "C) Liberar gás carbônico",
+}
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float((a == b).mean())
+
+
+def test_question_parts_strips_markers():
+    parts = question_parts("QUESTÃO 12 " + QUESTION, ALTERNATIVES)
+    assert parts == [
+        QUESTION,
+        "Absorver a energia luminosa",
+        "Armazenar amido nas raízes",
+        "Liberar gás carbônico",
+    ]
+    assert [part.strip() for part in question_parts("3. " + QUESTION, None)] == [QUESTION]
+    assert question_parts(None, None) == []
+
+    # Only the numbering is removed, whatever its style; numbers of the content stay
+    for text in ["12) 30 alunos fizeram a prova", "QUESTÃO 12 30 alunos fizeram a prova",
+                 "Q. 12 - 30 alunos fizeram a prova", "12. 30 alunos fizeram a prova"]:
+        assert [part.strip() for part in question_parts(text, None)] == ["30 alunos fizeram a prova"]
+
+
+def test_signature_is_deterministic_and_fixed_width():
+    parts = question_parts(QUESTION, ALTERNATIVES)
+    signature = MinHasher(64, 3).signature(parts)
+
+    assert signature.dtype == np.dtype('<u4')
+    assert signature.shape == (64,)
+    # Persisted signatures are compared across runs, a new hasher must reproduce them
+    assert np.array_equal(signature, MinHasher(64, 3).signature(parts))
+
+
+def test_signature_ignores_numbering_and_alternative_order():
+    hasher = MinHasher(128, 3)
+    original = hasher.signature(question_parts("1. " + QUESTION, ALTERNATIVES))
+    reordered = {"A": ALTERNATIVES["C"].replace("C)", "A)"), "B": ALTERNATIVES["A"].replace("A)", "B)"),
+                 "C": ALTERNATIVES["B"].replace("B)", "C)")}
+    renumbered = hasher.signature(question_parts("QUESTÃO 40 " + QUESTION, reordered))
+
+    assert np.array_equal(original, renumbered)
+
+
+def test_signature_similarity_tracks_overlap():
+    hasher = MinHasher(128, 3)
+    original = hasher.signature(question_parts(QUESTION, ALTERNATIVES))
+    edited = hasher.signature(question_parts(QUESTION.replace("verdes", "terrestres"), ALTERNATIVES))
+    unrelated = hasher.signature(question_parts("Quanto é dois mais dois em base dez?", {"A": "A) Quatro"}))
+
+    assert similarity(original, edited) > 0.6
+    assert similarity(original, unrelated) < 0.2
+
+
+def test_signature_without_words_is_none():
+    hasher = MinHasher(16, 3)
+    assert hasher.signature([]) is None
+    assert hasher.signature(["", " ... "]) is None
+    # Parts shorter than a shingle still produce one
+    assert hasher.signature(["fotossíntese"]) is not None
+
+
+def test_band_keys_split_signature_into_bands():
+    service = DedupService(num_perm=16, bands=4, shingle_size=3, threshold=0.8)
+    signature = np.arange(16, dtype='<u4')
+    keys = service.band_keys(signature)
+
+    assert [band for band, _ in keys] == [0, 1, 2, 3]
+    assert all(-2**63 <= bucket < 2**63 for _, bucket in keys)
+    assert keys == service.band_keys(signature.copy())
+
+    changed = signature.copy()
+    changed[5] += 1 # second band only
+    changed_keys = service.band_keys(changed)
+    assert [a == b for a, b in zip(keys, changed_keys)] == [True, False, True, True]
+
+
+def test_num_perm_must_divide_into_bands():
+    with pytest.raises(ValueError):
+        DedupService(num_perm=10, bands=4, shingle_size=3, threshold=0.8)
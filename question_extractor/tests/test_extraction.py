@@ -0,0 +1,94 @@
+import pytest
+from question_extractor.domain.extraction import ExtractionService, question_marker
+from question_extractor.domain.persistence import ExtractionRepository
+from question_extractor.infra.files import file_manager
+from question_extractor.ooxml.reader import DocxReader
+from tests.docx_builder import make_docx
+
+DOCUMENT = [
+    "1. Qual a capitl do Brasil?", "A) Brasília", "B) Rio de Janeiro",
+    "2. Quanto é 2 + 2?", "<table>", "A) 3", "B) 4",
+    "QUESTÃO 3 Qual o maior planeta?", "A) Júpiter", "B) Terra",
+]
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "output_path", tmp_path / "out")
+
+
+def extract(path):
+    return {q["question_id"]: q for q in ExtractionService(path).extract_all("doc")["questions"]}
+
+
+@pytest.mark.parametrize("text, marker", [
+    ("1. Qual a capital?", "1."),
+    ("12) 30 alunos", "12)"),
+    ("Questão 12 30 alunos", "QUESTÃO 12"),
+    ("Sem marcador", ""),
+])
+def test_question_marker_ignores_wording(text, marker):
+    assert question_marker(text) == marker
+
+
+def test_find_question_ranges_covers_the_body(tmp_path):
+    path = make_docx(tmp_path / "doc.docx", DOCUMENT)
+    service = ExtractionService(path)
+    with DocxReader(path) as reader:
+        ranges = service.find_question_ranges(reader, reader.get_body_blocks())
+
+    # The table stays inside question 2
+    assert ranges == [("q_0001", 0, 3), ("q_0002", 3, 7), ("q_0003", 7, 10)]
+
+
+def test_reextract_after_fixing_the_stem(tmp_path):
+    path = make_docx(tmp_path / "doc.docx", DOCUMENT)
+    first = extract(path)["q_0001"]
+
+    edited = list(DOCUMENT)
+    edited[0] = "1. Qual a capital do Brasil?"
+    make_docx(path, edited)
+    result = ExtractionService(path).extract_question("doc", "q_0001", 0, None, first["fingerprint"])
+
+    assert result["text"]["question"] == "1. Qual a capital do Brasil?"
+    assert result["block_range"] == [0, 3]
+    assert result["fingerprint"] == first["fingerprint"]
+
+
+def test_reextract_rescans_the_end_of_a_longer_question(tmp_path):
+    path = make_docx(tmp_path / "doc.docx", DOCUMENT)
+    second = extract(path)["q_0002"]
+
+    edited = list(DOCUMENT)
+    edited.insert(7, "C) 5")
+    make_docx(path, edited)
+    result = ExtractionService(path).extract_question("doc", "q_0002", 3, None, second["fingerprint"])
+
+    assert result["block_range"] == [3, 8]
+    assert sorted(result["files"]) == ["A", "B", "C", "question"]
+
+
+def test_reextract_refuses_a_range_that_moved_to_another_question(tmp_path):
+    path = make_docx(tmp_path / "doc.docx", DOCUMENT)
+    second = extract(path)["q_0002"]
+
+    # Question 1 and the table were removed: block 3 now starts question 3
+    make_docx(path, ["2. Quanto é 2 + 2?", "A) 3", "B) 4"] + DOCUMENT[7:])
+    with pytest.raises(ValueError, match="no longer holds"):
+        ExtractionService(path).extract_question("doc", "q_0002", 3, None, second["fingerprint"])
+
+
+def test_update_question_shifts_later_questions_only_when_the_source_changed(fake_db):
+    row = {"id": 7, "job_id": 3, "block_end": 6, "document_hash": "old"}
+    result = {"question_id": "q_0002", "status": "extracted", "block_range": [3, 8], "files": {}, "text": {}}
+    repository = ExtractionRepository()
+
+    repository.update_question(row, result, "old")
+    assert fake_db.statements("block_start = block_start +") == []
+
+    repository.update_question(row, result, "new")
+    assert fake_db.statements("block_start = block_start +") == [(2, 2, 3, 7, 6)]
+    # Only the re-extracted row moves to the new hash
+    [values] = [params for params in fake_db.statements("UPDATE extracted_questions SET status") if "new" in params]
+    assert values[-1] == 7
+    assert fake_db.statements("SET document_hash") == []
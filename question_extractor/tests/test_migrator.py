@@ -0,0 +1,53 @@
+import pytest
+from question_extractor.infra.migrator import MigrationRunner
+from question_extractor.infra.settings import settings
+
+
+@pytest.fixture
+def partitions(fake_db, monkeypatch):
+    monkeypatch.setattr(settings, "QUESTIONS_PARTITION_SIZE", 100)
+    monkeypatch.setattr(settings, "QUESTIONS_PARTITIONS_AHEAD", 1)
+    fake_db.respond("max_job", [{"max_job": 250}])
+    fake_db.respond("information_schema.columns", [{"column_name": "id"}, {"column_name": "job_id"}])
+    return fake_db
+
+
+def positions(fake_db, fragment):
+    return [i for i, (query, _) in enumerate(fake_db.executed) if fragment in query]
+
+
+def test_ensure_partitions_creates_missing_ranges(partitions):
+    existing = {"public.extracted_questions_p0"}
+    partitions.respond("to_regclass", lambda params: [{"rel": params[0] if params[0] in existing else None}])
+    partitions.respond("AS taken", [{"taken": False}])
+
+    MigrationRunner().ensure_partitions(partitions)
+
+    created = [query for query, _ in partitions.executed if "CREATE TABLE" in query]
+    assert len(created) == 3
+    assert 'FROM (300) TO (400)' in created[-1]
+    assert positions(partitions, "DETACH PARTITION") == []
+
+
+def test_ensure_partitions_moves_rows_out_of_the_default_partition(partitions):
+    partitions.respond("to_regclass", [{"rel": None}])
+    # Job 250 was created past the horizon and its rows went to the default partition
+    partitions.respond("AS taken", lambda params: [{"taken": params == (200, 300)}])
+
+    MigrationRunner().ensure_partitions(partitions)
+
+    [detach] = positions(partitions, "DETACH PARTITION")
+    creates = positions(partitions, "CREATE TABLE")
+    [move] = positions(partitions, "WITH moved AS")
+    [attach] = positions(partitions, "ATTACH PARTITION")
+    assert detach < min(creates) and max(creates) < move < attach
+    assert partitions.executed[move][1] == (200, 300)
+
+
+def test_conversion_refuses_rows_without_job(fake_db):
+    fake_db.respond("AS orphans", [{"orphans": 3}])
+
+    with pytest.raises(RuntimeError, match="3 extracted_questions rows"):
+        MigrationRunner()._convert_to_partitioned(fake_db)
+
+    assert positions(fake_db, "ALTER TABLE") == []
@@ -0,0 +1,111 @@
+from question_extractor.domain.extraction import ExtractionService
+from question_extractor.domain.persistence import ExtractionRepository, JobCheckpoint
+from question_extractor.infra.files import file_manager
+from question_extractor.infra.settings import settings
+from tests.docx_builder import make_docx, questions
+
+
+class RecordingRepository:
+    def __init__(self):
+        self.batches = []
+        self.statuses = []
+        self.renewals = 0
+
+    def save_checkpoint(self, job_id, questions, document_hash):
+        self.batches.append([q["question_id"] for q in questions])
+
+    def update_job_status(self, job_id, status, error_message=None):
+        self.statuses.append(status)
+
+    def renew_job(self, job_id):
+        self.renewals += 1
+
+
+def result(q_id):
+    return {"question_id": q_id, "status": "extracted", "block_range": [0, 1]}
+
+
+def checkpoint(repository, batch_size=2, lease_seconds=600, completed=None):
+    return JobCheckpoint(repository, 1, "hash", completed or {}, batch_size, lease_seconds)
+
+
+def test_checkpoint_commits_in_batches():
+    repository = RecordingRepository()
+    job = checkpoint(repository)
+
+    for n in range(5):
+        job.add(result(f"q_{n}"))
+    assert repository.batches == [["q_0", "q_1"], ["q_2", "q_3"]]
+
+    job.finish()
+    assert repository.batches[-1] == ["q_4"]
+    assert repository.statuses == ["completed"]
+
+
+def test_checkpoint_failure_keeps_pending_rows():
+    repository = RecordingRepository()
+    job = checkpoint(repository, batch_size=10)
+    job.add(result("q_0"))
+    job.fail("boom")
+
+    assert repository.batches == [["q_0"]]
+    assert repository.statuses == ["failed"]
+
+
+def test_checkpoint_commits_early_when_lease_is_half_gone(monkeypatch):
+    repository = RecordingRepository()
+    now = [1000.0]
+    monkeypatch.setattr("question_extractor.domain.persistence.time.monotonic", lambda: now[0])
+    job = checkpoint(repository, batch_size=50, lease_seconds=600)
+
+    job.add(result("q_0"))
+    assert repository.batches == []
+    now[0] += 300
+    job.add(result("q_1"))
+    assert repository.batches == [["q_0", "q_1"]]
+
+    # Without pending rows the lease is renewed directly
+    job.renew()
+    assert repository.renewals == 0
+    now[0] += 300
+    job.renew()
+    assert repository.renewals == 1
+
+
+def test_resumed_job_skips_completed_questions(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "output_path", tmp_path / "out")
+    path = make_docx(tmp_path / "doc.docx", questions(3))
+    previous = {"q_0002": {**result("q_0002"), "text": {"question": "2. saved"}, "files": {}}}
+    repository = RecordingRepository()
+    job = checkpoint(repository, batch_size=10, completed=previous)
+
+    report = ExtractionService(path).extract_all("doc", job)
+
+    assert repository.batches == [["q_0001", "q_0003"]]
+    assert [q["question_id"] for q in report["questions"]] == ["q_0001", "q_0002", "q_0003"]
+    assert report["questions"][1] is previous["q_0002"]
+
+
+def test_start_job_claims_only_failed_or_expired_jobs(tmp_path, fake_db):
+    path = make_docx(tmp_path / "doc.docx", questions(1))
+    document_hash = file_manager.hash_file(path)
+    fake_db.respond("FOR UPDATE", [{"job_id": 9}])
+
+    job = ExtractionRepository().start_job("doc", path)
+
+    assert job.job_id == 9
+    assert fake_db.statements("pg_advisory_xact_lock") == [(f"doc:{document_hash}",)]
+    assert fake_db.statements("FOR UPDATE") == [("doc", document_hash, settings.JOB_LEASE_SECONDS)]
+    assert fake_db.statements("SET status = 'processing'") == [(9,)]
+    assert fake_db.statements("INSERT INTO extraction_jobs") == []
+
+
+def test_start_job_creates_a_job_when_none_can_be_claimed(tmp_path, fake_db):
+    path = make_docx(tmp_path / "doc.docx", questions(1))
+    fake_db.respond("INSERT INTO extraction_jobs", [{"job_id": 10}])
+
+    job = ExtractionRepository().start_job("doc", path)
+
+    assert job.job_id == 10
+    assert job.completed == {}
+    assert fake_db.statements("SET status = 'processing'") == []
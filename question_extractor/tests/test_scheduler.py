@@ -0,0 +1,150 @@
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import List
+import pytest
+from question_extractor.domain.extraction import ExtractionService
+from question_extractor.domain.scheduler import (
+    BatchScheduler, DocumentTask, Shard, _Unit, _plan_document, estimate_task, split_shards,
+)
+from question_extractor.infra.files import file_manager
+from question_extractor.ooxml.archive import DOCUMENT_PART
+from tests.docx_builder import make_docx, questions
+
+
+def ranges(sizes: List[int]):
+    result, start = [], 0
+    for n, size in enumerate(sizes):
+        result.append((f"q_{n + 1:04d}", start, start + size))
+        start += size
+    return result
+
+
+def task(name: str, xml_size: int, file_size: int = 0, parts_size: int = 0) -> DocumentTask:
+    return DocumentTask(name, Path(f"{name}.docx"), file_size, xml_size, parts_size or xml_size)
+
+
+def scheduler(**kwargs) -> BatchScheduler:
+    options = dict(workers=4, memory_budget=100, memory_factor=1, shard_min_xml=1000)
+    options.update(kwargs)
+    return BatchScheduler(**options)
+
+
+@pytest.mark.parametrize("sizes, count, expected", [
+    ([1] * 10, 4, [2, 3, 2, 3]),
+    ([1] * 10, 7, [1, 2, 1, 2, 1, 2, 1]),
+    ([1] * 3, 8, [1, 1, 1]),
+    ([10, 1, 1], 3, [1, 2]),
+    ([1, 1, 1, 1, 8], 2, [4, 1]),
+])
+def test_split_shards_cuts_at_cumulative_boundaries(sizes, count, expected):
+    question_ranges = ranges(sizes)
+    shards = split_shards(question_ranges, count)
+
+    assert [len(shard) for shard in shards] == expected
+    # Contiguous and in order
+    assert [r for shard in shards for r in shard] == question_ranges
+
+
+def test_split_shards_without_questions():
+    assert split_shards([], 4) == []
+
+
+def test_queue_orders_by_cost_and_plans_large_documents():
+    tasks = [task("small", 10), task("large", 5000), task("medium", 10, file_size=500)]
+    queue = scheduler().queue(tasks)
+
+    assert [(u.task.doc_source_id, u.kind) for u in queue] == [
+        ("large", "plan"), ("medium", "document"), ("small", "document"),
+    ]
+
+
+def test_admit_stays_within_budget_and_workers():
+    # Units reserve 2 x xml_size with factor 1: the parsed tree and the raw part
+    queue = deque(_Unit('document', task(name, 15)) for name in "abcde")
+    admitted = scheduler(workers=4, memory_budget=100).admit(queue, reserved=0, running=0)
+
+    assert [u.task.doc_source_id for u in admitted] == ["a", "b", "c"]
+    assert [u.task.doc_source_id for u in queue] == ["d", "e"]
+
+    queue = deque(_Unit('document', task(name, 5)) for name in "abcde")
+    admitted = scheduler(workers=4, memory_budget=100).admit(queue, reserved=0, running=2)
+    assert len(admitted) == 2
+
+
+def test_blocked_head_stops_backfill():
+    queue = deque([_Unit('document', task("big", 40)), _Unit('document', task("small", 5))])
+    admitted = scheduler(memory_budget=100).admit(queue, reserved=50, running=1)
+
+    # "small" would fit, but starting it would keep "big" waiting
+    assert admitted == []
+    assert len(queue) == 2
+
+
+def test_unit_over_budget_runs_alone():
+    queue = deque([_Unit('document', task("huge", 250)), _Unit('document', task("small", 5))])
+    sched = scheduler(memory_budget=100)
+
+    assert sched.admit(queue, reserved=20, running=1) == []
+    admitted = sched.admit(queue, reserved=0, running=0)
+    assert [u.task.doc_source_id for u in admitted] == ["huge"]
+
+
+def test_memory_counts_parsed_xml_and_package_parts():
+    sched = scheduler(memory_factor=10)
+    # 1000 bytes of document.xml and 5000 bytes of media
+    doc = task("doc", 1000, parts_size=6000)
+    shard = Shard(0, ranges([1]), b"x" * 7)
+
+    assert sched.memory(_Unit('document', doc)) == 10000 + 6000
+    # Each shard parses its slice but holds the media too
+    assert sched.memory(_Unit('shard', doc, shard)) == 70 + 7 + 5000
+
+
+def test_estimate_task_reads_sizes_from_central_directory(tmp_path):
+    path = tmp_path / "doc.docx"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr(DOCUMENT_PART, b"<w:document/>" * 100)
+        docx.writestr("word/media/image1.png", b"\0" * 5000)
+
+    estimated = estimate_task("doc", path)
+    assert estimated.xml_size == 1300
+    assert estimated.parts_size == 6300
+    assert estimated.file_size == path.stat().st_size
+
+
+def test_failed_plan_marks_the_job_failed(tmp_path, fake_db):
+    path = tmp_path / "broken.docx"
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr(DOCUMENT_PART, "<document/>") # no body
+    fake_db.respond("RETURNING job_id", [{"job_id": 5}])
+
+    with pytest.raises(ValueError):
+        _plan_document("broken", path, True, 2)
+
+    [(status, error, job_id)] = fake_db.statements("SET status = %s")
+    assert (status, job_id) == ("failed", 5)
+    assert "w:body" in error
+
+
+def test_sharded_run_matches_single_extraction(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, "output_path", tmp_path / "out")
+    # A table inside the first question, tables never start a question or an alternative
+    paragraphs = questions(9)
+    paragraphs.insert(1, "<table>")
+    sharded_path = make_docx(tmp_path / "sharded.docx", paragraphs)
+    whole_path = make_docx(tmp_path / "whole.docx", paragraphs)
+    sched = BatchScheduler(workers=3, memory_budget=1 << 30, memory_factor=10, shard_min_xml=0)
+
+    [sharded] = list(sched.run([estimate_task("sharded", sharded_path)]))
+    whole = ExtractionService(whole_path).extract_all("whole")
+
+    assert sharded["stats"] == whole["stats"] == {"total": 9, "extracted": 9, "error": 0}
+    for a, b in zip(sharded["questions"], whole["questions"]):
+        assert a["question_id"] == b["question_id"]
+        assert a["block_range"] == b["block_range"]
+        assert a["fingerprint"] == b["fingerprint"]
+        assert a["text"] == b["text"]
+        for key, path in a["files"].items():
+            with zipfile.ZipFile(path) as x, zipfile.ZipFile(b["files"][key]) as y:
+                assert x.read(DOCUMENT_PART) == y.read(DOCUMENT_PART)